@@ -81,27 +81,32 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
     # Analyze search event distribution across clients
     # A search event = (username, query) with timestamps bucketed by window
     # We use floor(timestamp / window) to bucket events
+    #
+    # Every analysis below works on the same per-client events, so bucket the
+    # searches once (a hash aggregate, no sort) into a temp table with one row
+    # per (client, event) instead of rescanning searches for each query
     cursor.execute("""
-        WITH search_events AS (
-            SELECT
-                username,
-                LOWER(TRIM(query)) as norm_query,
-                client_id,
-                -- Bucket timestamp to window to group same user+query within window
-                FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket,
-                MIN(timestamp) as first_seen
-            FROM searches
-            WHERE timestamp >= %s AND timestamp <= %s
-            GROUP BY username, LOWER(TRIM(query)), client_id,
-                     FLOOR(EXTRACT(EPOCH FROM timestamp) / %s)
-        ),
-        event_client_counts AS (
-            SELECT
-                username,
-                norm_query,
-                time_bucket,
-                COUNT(DISTINCT client_id) as client_count
-            FROM search_events
+        CREATE TEMP TABLE client_events AS
+        SELECT
+            username,
+            LOWER(TRIM(query)) as norm_query,
+            client_id,
+            -- Bucket timestamp to window to group same user+query within window
+            FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket,
+            MIN(timestamp) as first_seen
+        FROM searches
+        WHERE timestamp >= %s AND timestamp <= %s
+        GROUP BY username, LOWER(TRIM(query)), client_id,
+                 FLOOR(EXTRACT(EPOCH FROM timestamp) / %s)
+    """, (window_seconds, start_time, end_time, window_seconds))
+    cursor.execute("ANALYZE client_events")
+
+    # client_events is unique per (client, event), so COUNT(*) over an event
+    # key is its number of distinct clients
+    cursor.execute("""
+        WITH event_client_counts AS (
+            SELECT COUNT(*) as client_count
+            FROM client_events
             GROUP BY username, norm_query, time_bucket
         )
         SELECT
@@ -110,7 +115,7 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
         FROM event_client_counts
         GROUP BY client_count
         ORDER BY client_count
-    """, (window_seconds, start_time, end_time, window_seconds))
+    """)
 
     results = cursor.fetchall()
     total_events = sum(row['event_count'] for row in results)
@@ -124,30 +129,11 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
         pct = (row['event_count'] / total_events * 100) if total_events > 0 else 0
         print(f"  Seen on {row['client_count']} client(s): {row['event_count']:,} events ({pct:.1f}%)")
 
-    # Calculate convergence rate (events seen on ALL clients)
+    # Calculate convergence rate (events seen on ALL clients), read off the
+    # distribution above instead of re-aggregating the events
     if clients:
-        cursor.execute("""
-            WITH search_events AS (
-                SELECT
-                    username,
-                    LOWER(TRIM(query)) as norm_query,
-                    client_id,
-                    FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket
-                FROM searches
-                WHERE timestamp >= %s AND timestamp <= %s
-                GROUP BY username, LOWER(TRIM(query)), client_id,
-                         FLOOR(EXTRACT(EPOCH FROM timestamp) / %s)
-            )
-            SELECT COUNT(*) as full_convergence
-            FROM (
-                SELECT username, norm_query, time_bucket
-                FROM search_events
-                GROUP BY username, norm_query, time_bucket
-                HAVING COUNT(DISTINCT client_id) = %s
-            ) t
-        """, (window_seconds, start_time, end_time, window_seconds, len(clients)))
-
-        full_convergence = cursor.fetchone()['full_convergence']
+        full_convergence = sum(row['event_count'] for row in results
+                               if row['client_count'] == len(clients))
         convergence_rate = (full_convergence / total_events * 100) if total_events > 0 else 0
 
         print(f"\n{'='*60}")
@@ -161,28 +147,16 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
     print(f"{'='*60}")
 
     cursor.execute("""
-        WITH event_times AS (
-            SELECT
-                username,
-                LOWER(TRIM(query)) as norm_query,
-                FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket,
-                client_id,
-                MIN(timestamp) as first_seen
-            FROM searches
-            WHERE timestamp >= %s AND timestamp <= %s
-            GROUP BY username, LOWER(TRIM(query)),
-                     FLOOR(EXTRACT(EPOCH FROM timestamp) / %s), client_id
-        ),
-        multi_client_events AS (
+        WITH multi_client_events AS (
             SELECT
                 username,
                 norm_query,
                 time_bucket,
                 EXTRACT(EPOCH FROM (MAX(first_seen) - MIN(first_seen))) as spread_seconds,
-                COUNT(DISTINCT client_id) as client_count
-            FROM event_times
+                COUNT(*) as client_count
+            FROM client_events
             GROUP BY username, norm_query, time_bucket
-            HAVING COUNT(DISTINCT client_id) >= 2
+            HAVING COUNT(*) >= 2
         ),
         bucketed AS (
             SELECT
@@ -210,7 +184,7 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
         FROM bucketed
         GROUP BY time_spread, sort_order
         ORDER BY sort_order
-    """, (window_seconds, start_time, end_time, window_seconds))
+    """)
 
     print("\nFor events seen on 2+ clients, time between first and last reception:")
     for row in cursor.fetchall():
@@ -222,26 +196,28 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
         print("Client Overlap Analysis (is one client a subset of another?)")
         print(f"{'='*60}\n")
 
-        # Get unique events per client
+        # Get unique events per client, and how many of them no other client
+        # saw, in one pass: client_events has one row per (client, event), so
+        # a window count over the event key is its number of clients
         cursor.execute("""
-            WITH client_events AS (
+            WITH event_client_counts AS (
                 SELECT
                     client_id,
-                    username,
-                    LOWER(TRIM(query)) as norm_query,
-                    FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket
-                FROM searches
-                WHERE timestamp >= %s AND timestamp <= %s
-                GROUP BY client_id, username, LOWER(TRIM(query)),
-                         FLOOR(EXTRACT(EPOCH FROM timestamp) / %s)
+                    COUNT(*) OVER (PARTITION BY username, norm_query, time_bucket) as num_clients
+                FROM client_events
             )
-            SELECT client_id, COUNT(*) as unique_events
-            FROM client_events
+            SELECT
+                client_id,
+                COUNT(*) as unique_events,
+                COUNT(*) FILTER (WHERE num_clients = 1) as unique_count
+            FROM event_client_counts
             GROUP BY client_id
             ORDER BY client_id
-        """, (window_seconds, start_time, end_time, window_seconds))
+        """)
 
-        client_event_counts = {row['client_id']: row['unique_events'] for row in cursor.fetchall()}
+        client_rows = cursor.fetchall()
+        client_event_counts = {row['client_id']: row['unique_events'] for row in client_rows}
+        unique_contributions = {row['client_id']: row['unique_count'] for row in client_rows}
 
         print("Unique events per client:")
         for client, count in sorted(client_event_counts.items()):
@@ -251,37 +227,25 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
         print("\nPairwise overlap:")
         print("  (A → B means '% of A's events that B also has')\n")
 
+        # Shared events for every client pair in one self-join. client_events
+        # has one row per (client, event), so each joined row is one event
+        # seen by both clients and the overlap is symmetric
+        cursor.execute("""
+            SELECT a.client_id as client_a, b.client_id as client_b, COUNT(*) as shared
+            FROM client_events a
+            JOIN client_events b
+              ON a.username = b.username AND a.norm_query = b.norm_query
+             -- "C" collation orders pairs the same way as sorted(clients)
+             AND a.time_bucket = b.time_bucket AND a.client_id < b.client_id COLLATE "C"
+            GROUP BY a.client_id, b.client_id
+        """)
+        shared_events = {(row['client_a'], row['client_b']): row['shared']
+                         for row in cursor.fetchall()}
+
         for client_a, client_b in combinations(sorted(clients), 2):
-            cursor.execute("""
-                WITH events_a AS (
-                    SELECT DISTINCT username, LOWER(TRIM(query)) as norm_query,
-                           FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket
-                    FROM searches
-                    WHERE client_id = %s AND timestamp >= %s AND timestamp <= %s
-                ),
-                events_b AS (
-                    SELECT DISTINCT username, LOWER(TRIM(query)) as norm_query,
-                           FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket
-                    FROM searches
-                    WHERE client_id = %s AND timestamp >= %s AND timestamp <= %s
-                )
-                SELECT
-                    (SELECT COUNT(*) FROM events_a) as count_a,
-                    (SELECT COUNT(*) FROM events_b) as count_b,
-                    (SELECT COUNT(*) FROM events_a a WHERE EXISTS (
-                        SELECT 1 FROM events_b b
-                        WHERE a.username = b.username AND a.norm_query = b.norm_query AND a.time_bucket = b.time_bucket
-                    )) as a_in_b,
-                    (SELECT COUNT(*) FROM events_b b WHERE EXISTS (
-                        SELECT 1 FROM events_a a
-                        WHERE b.username = a.username AND b.norm_query = a.norm_query AND b.time_bucket = a.time_bucket
-                    )) as b_in_a
-            """, (window_seconds, client_a, start_time, end_time,
-                  window_seconds, client_b, start_time, end_time))
-
-            row = cursor.fetchone()
-            count_a, count_b = row['count_a'], row['count_b']
-            a_in_b, b_in_a = row['a_in_b'], row['b_in_a']
+            count_a = client_event_counts.get(client_a, 0)
+            count_b = client_event_counts.get(client_b, 0)
+            a_in_b = b_in_a = shared_events.get((client_a, client_b), 0)
 
             pct_a_in_b = (a_in_b / count_a * 100) if count_a > 0 else 0
             pct_b_in_a = (b_in_a / count_b * 100) if count_b > 0 else 0
@@ -299,40 +263,6 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
 
         # Unique contribution analysis - what does each client add?
         print("Unique contribution (events ONLY seen on this client):")
-        cursor.execute("""
-            WITH client_events AS (
-                SELECT
-                    client_id,
-                    username,
-                    LOWER(TRIM(query)) as norm_query,
-                    FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket
-                FROM searches
-                WHERE timestamp >= %s AND timestamp <= %s
-                GROUP BY client_id, username, LOWER(TRIM(query)),
-                         FLOOR(EXTRACT(EPOCH FROM timestamp) / %s)
-            ),
-            event_client_counts AS (
-                SELECT username, norm_query, time_bucket, COUNT(DISTINCT client_id) as num_clients
-                FROM client_events
-                GROUP BY username, norm_query, time_bucket
-            ),
-            unique_only AS (
-                SELECT ce.client_id, COUNT(*) as unique_count
-                FROM client_events ce
-                JOIN event_client_counts ecc
-                    ON ce.username = ecc.username
-                    AND ce.norm_query = ecc.norm_query
-                    AND ce.time_bucket = ecc.time_bucket
-                WHERE ecc.num_clients = 1
-                GROUP BY ce.client_id
-            )
-            SELECT client_id, unique_count
-            FROM unique_only
-            ORDER BY client_id
-        """, (window_seconds, start_time, end_time, window_seconds))
-
-        unique_contributions = {row['client_id']: row['unique_count'] for row in cursor.fetchall()}
-
         for client in sorted(clients):
             unique = unique_contributions.get(client, 0)
             total = client_event_counts.get(client, 0)
@@ -346,30 +276,18 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
         print(f"{'='*60}\n")
 
         cursor.execute("""
-            WITH event_times AS (
-                SELECT
-                    username,
-                    LOWER(TRIM(query)) as norm_query,
-                    FLOOR(EXTRACT(EPOCH FROM timestamp) / %s) as time_bucket,
-                    client_id,
-                    MIN(timestamp) as first_seen
-                FROM searches
-                WHERE timestamp >= %s AND timestamp <= %s
-                GROUP BY username, LOWER(TRIM(query)),
-                         FLOOR(EXTRACT(EPOCH FROM timestamp) / %s), client_id
-            )
             SELECT
                 username,
                 norm_query,
                 ARRAY_AGG(client_id ORDER BY first_seen) as client_order,
                 MIN(first_seen) as earliest,
                 MAX(first_seen) as latest
-            FROM event_times
+            FROM client_events
             GROUP BY username, norm_query, time_bucket
-            HAVING COUNT(DISTINCT client_id) = %s
+            HAVING COUNT(*) = %s
             ORDER BY earliest DESC
             LIMIT 10
-        """, (window_seconds, start_time, end_time, window_seconds, len(clients)))
+        """, (len(clients),))
 
         for row in cursor.fetchall():
             spread = (row['latest'] - row['earliest']).total_seconds()
@@ -380,6 +298,8 @@ def analyze_convergence(conn, hours: int = 24, offset_minutes: int = 0, window_m
             print(f"    Clients: {' -> '.join(row['client_order'])}")
             print(f"    Spread: {spread:.1f}s\n")
 
+    cursor.execute("DROP TABLE client_events")
+
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze query convergence across clients')
@@ -4,24 +4,34 @@ Generate statistics dashboard for Soulseek research data.
 Queries pre-computed materialized views and cumulative stats table.
 """
 
+import bisect
 import fnmatch
 import hashlib
 import json
+import multiprocessing.util
 import os
 import re
+import string
+import weakref
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TextIO, Tuple
 
 import numpy as np
 import psycopg2
 import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
 import mistune
 import yaml
 from scipy.sparse import csr_matrix
 from sklearn.metrics.pairwise import cosine_similarity
 
+# libyaml-backed dumper when PyYAML was built with it; same output as the
+# pure-Python one for the plain id/label lists written to docs/_data
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 
 def format_days(first_search_str, last_search_str):
     """Calculate days of data from first/last search timestamps.
@@ -71,23 +81,13 @@ def get_db_connection():
     if not database_url:
         raise ValueError("DATABASE_URL environment variable not set")
 
-    # Parse postgresql:// URL to connection params
-    if database_url.startswith('postgresql://'):
-        database_url = database_url.replace('postgresql://', '')
-    elif database_url.startswith('postgresql+asyncpg://'):
-        database_url = database_url.replace('postgresql+asyncpg://', '')
-
-    parts = database_url.split('@')
-    user_pass = parts[0].split(':')
-    host_db = parts[1].split('/')
-    host_port = host_db[0].split(':')
+    # libpq parses the URL itself, including percent-escaped credentials;
+    # only the SQLAlchemy async driver alias needs rewriting
+    if database_url.startswith('postgresql+asyncpg://'):
+        database_url = database_url.replace('postgresql+asyncpg://', 'postgresql://', 1)
 
     return psycopg2.connect(
-        host=host_port[0],
-        port=int(host_port[1]) if len(host_port) > 1 else 5432,
-        user=user_pass[0],
-        password=user_pass[1] if len(user_pass) > 1 else '',
-        dbname=host_db[1],
+        database_url,
         connect_timeout=30,
         options='-c statement_timeout=600000',
         keepalives=1,
@@ -97,6 +97,55 @@ def get_db_connection():
     )
 
 
+# Archived + live daily per-client stats
+DAILY_CLIENT_STATS_SQL = """
+    SELECT client_id, date, search_count, unique_users FROM daily_client_stats
+    UNION ALL
+    SELECT client_id, date, search_count, unique_users FROM mv_daily_stats
+"""
+
+# Queries run once per period page. They are prepared once per connection
+# (see _execute_prepared) instead of being parsed and planned for every
+# week and month.
+PERIOD_QUERIES = {
+    'period_daily_rows': f"""
+        SELECT client_id, date, search_count, unique_users
+        FROM ({DAILY_CLIENT_STATS_SQL}) combined
+        WHERE date >= $1 AND date <= $2
+        ORDER BY date, client_id
+    """,
+    'period_summary': """
+        SELECT unique_queries, unique_pairs, total_searches, total_users
+        FROM period_summary_stats
+        WHERE period_type = $1 AND period_id = $2
+    """,
+    'period_top_queries': """
+        SELECT query_normalized, unique_users, total_searches
+        FROM period_top_queries
+        WHERE period_type = $1 AND period_id = $2
+        ORDER BY rank
+    """,
+    'period_length_dist': """
+        SELECT query_length, unique_query_count as count
+        FROM period_query_length_dist
+        WHERE period_type = $1 AND period_id = $2
+        ORDER BY query_length
+    """,
+}
+
+# Names of the PERIOD_QUERIES already prepared on each connection
+_prepared_queries = weakref.WeakKeyDictionary()
+
+
+def _execute_prepared(cursor, name: str, params: tuple) -> None:
+    """Execute PERIOD_QUERIES[name] as a server-side prepared statement."""
+    prepared = _prepared_queries.setdefault(cursor.connection, set())
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {PERIOD_QUERIES[name]}")
+        prepared.add(name)
+    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+
 def get_cumulative_stats(conn) -> Dict[str, Any]:
     """Get all-time stats from precomputed period_summary_stats."""
     cursor = conn.cursor()
@@ -159,34 +208,21 @@ def get_cumulative_stats(conn) -> Dict[str, Any]:
 
 
 
-def get_daily_stats(conn, start_date=None, end_date=None) -> pd.DataFrame:
-    """Get daily stats from archived + live data, optionally filtered by date range"""
+def get_daily_stats(conn, end_date=None) -> pd.DataFrame:
+    """Get daily search counts per client from archived + live data, optionally up to end_date"""
     cursor = conn.cursor()
 
-    base_query = """
-        SELECT client_id, date, search_count, unique_users FROM daily_client_stats
-        UNION ALL
-        SELECT client_id, date, search_count, unique_users FROM mv_daily_stats
-    """
-
-    if start_date and end_date:
-        cursor.execute(f"""
-            SELECT client_id, date, search_count, unique_users
-            FROM ({base_query}) combined
-            WHERE date >= %s AND date <= %s
-            ORDER BY date, client_id
-        """, (start_date.date(), end_date.date()))
-    elif end_date:
+    if end_date:
         cursor.execute(f"""
-            SELECT client_id, date, search_count, unique_users
-            FROM ({base_query}) combined
+            SELECT client_id, date, search_count
+            FROM ({DAILY_CLIENT_STATS_SQL}) combined
             WHERE date <= %s
             ORDER BY date, client_id
         """, (end_date.date(),))
     else:
         cursor.execute(f"""
-            SELECT client_id, date, search_count, unique_users
-            FROM ({base_query}) combined
+            SELECT client_id, date, search_count
+            FROM ({DAILY_CLIENT_STATS_SQL}) combined
             ORDER BY date, client_id
         """)
 
@@ -194,33 +230,23 @@ def get_daily_stats(conn, start_date=None, end_date=None) -> pd.DataFrame:
     cursor.close()
 
     if not rows:
-        return pd.DataFrame(columns=['client_id', 'date', 'search_count', 'unique_users'])
+        return pd.DataFrame(columns=['client_id', 'date', 'search_count'])
 
-    return pd.DataFrame(rows, columns=['client_id', 'date', 'search_count', 'unique_users'])
+    return pd.DataFrame(rows, columns=['client_id', 'date', 'search_count'])
 
 
-def get_daily_unique_users(conn, start_date=None, end_date=None) -> pd.DataFrame:
-    """Get daily unique users from archived + live data (approximation - max across clients per day)"""
-    cursor = conn.cursor()
+def get_daily_unique_users(conn, end_date=None) -> List[tuple]:
+    """Get daily unique users from archived + live data (approximation - max across clients per day)
 
-    base_query = """
-        SELECT client_id, date, search_count, unique_users FROM daily_client_stats
-        UNION ALL
-        SELECT client_id, date, search_count, unique_users FROM mv_daily_stats
+    Returns:
+        List of (date, unique_users) tuples ordered by date
     """
+    cursor = conn.cursor()
 
-    if start_date and end_date:
-        cursor.execute(f"""
-            SELECT date, MAX(unique_users) as unique_users
-            FROM ({base_query}) combined
-            WHERE date >= %s AND date <= %s
-            GROUP BY date
-            ORDER BY date
-        """, (start_date.date(), end_date.date()))
-    elif end_date:
+    if end_date:
         cursor.execute(f"""
             SELECT date, MAX(unique_users) as unique_users
-            FROM ({base_query}) combined
+            FROM ({DAILY_CLIENT_STATS_SQL}) combined
             WHERE date <= %s
             GROUP BY date
             ORDER BY date
@@ -228,18 +254,14 @@ def get_daily_unique_users(conn, start_date=None, end_date=None) -> pd.DataFrame
     else:
         cursor.execute(f"""
             SELECT date, MAX(unique_users) as unique_users
-            FROM ({base_query}) combined
+            FROM ({DAILY_CLIENT_STATS_SQL}) combined
             GROUP BY date
             ORDER BY date
         """)
 
     rows = cursor.fetchall()
     cursor.close()
-
-    if not rows:
-        return pd.DataFrame(columns=['date', 'unique_users'])
-
-    return pd.DataFrame(rows, columns=['date', 'unique_users'])
+    return rows
 
 
 def get_top_queries(conn) -> List[tuple]:
@@ -256,8 +278,12 @@ def get_top_queries(conn) -> List[tuple]:
     return rows
 
 
-def get_query_length_distribution(conn) -> pd.DataFrame:
-    """Get all-time query length distribution from precomputed period table."""
+def get_query_length_distribution(conn) -> List[tuple]:
+    """Get all-time query length distribution from precomputed period table.
+
+    Returns:
+        List of (query_length, count) tuples ordered by length
+    """
     cursor = conn.cursor()
     cursor.execute("""
         SELECT query_length, unique_query_count
@@ -267,64 +293,83 @@ def get_query_length_distribution(conn) -> pd.DataFrame:
     """)
     rows = cursor.fetchall()
     cursor.close()
+    return rows
 
-    if not rows:
-        return pd.DataFrame(columns=['query_length', 'count'])
 
-    return pd.DataFrame(rows, columns=['query_length', 'count'])
+def get_period_daily_rows(conn, start_date, end_date) -> List[tuple]:
+    """Get archived + live per-client daily stats for a period.
 
+    A period page derives its totals and both daily charts from these rows,
+    so the daily stats are read once per period instead of once per chart.
 
-def get_period_stats(conn, start_date, end_date, period_type: str = None, period_id: str = None) -> Dict[str, Any]:
-    """Get stats for a specific period using archived + live daily stats"""
+    Returns:
+        List of (client_id, date, search_count, unique_users) tuples ordered by date, client_id
+    """
     cursor = conn.cursor()
+    _execute_prepared(cursor, 'period_daily_rows', (start_date.date(), end_date.date()))
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
 
-    base_query = """
-        SELECT client_id, date, search_count, unique_users FROM daily_client_stats
-        UNION ALL
-        SELECT client_id, date, search_count, unique_users FROM mv_daily_stats
-    """
 
-    # Use archived + live daily stats for fast aggregation
-    cursor.execute(f"""
-        SELECT
-            COALESCE(SUM(search_count), 0) as total_searches,
-            COALESCE(SUM(unique_users), 0) as total_users,
-            MIN(date) as first_date,
-            MAX(date) as last_date
-        FROM ({base_query}) combined
-        WHERE date >= %s AND date <= %s
-    """, (start_date.date(), end_date.date()))
-
-    result = cursor.fetchone()
-
-    if result is None or result[0] == 0:
-        cursor.close()
-        return None
+def split_daily_rows_by_period(conn, period_jobs: List[Tuple[str, Dict]],
+                               cutoff_date) -> List[List[tuple]]:
+    """Read the archived + live daily stats once and slice them per period.
 
-    total_searches, total_users, first_date, last_date = result
-    total_searches = int(total_searches) if total_searches else 0
-    total_users = int(total_users) if total_users else 0
+    Every week and month page needs the same per-client daily rows for its
+    date range; one ordered scan up to the cutoff replaces a range query per
+    page (each of which re-reads the UNION over daily_client_stats and
+    mv_daily_stats).
 
-    # Get per-client totals from archived + live daily stats
+    Returns:
+        One list of (client_id, date, search_count, unique_users) tuples per
+        job, in period_jobs order, each ordered by date, client_id
+    """
+    cursor = conn.cursor()
     cursor.execute(f"""
-        SELECT client_id, SUM(search_count) as count
-        FROM ({base_query}) combined
-        WHERE date >= %s AND date <= %s
-        GROUP BY client_id
-    """, (start_date.date(), end_date.date()))
-    client_totals = {row[0]: int(row[1]) for row in cursor.fetchall()}
-
+        SELECT client_id, date, search_count, unique_users
+        FROM ({DAILY_CLIENT_STATS_SQL}) combined
+        WHERE date <= %s
+        ORDER BY date, client_id
+    """, (cutoff_date.date(),))
+    rows = cursor.fetchall()
     cursor.close()
 
+    dates = [row[1] for row in rows]
+    slices = []
+    for _, period_info in period_jobs:
+        end_date = min(period_info['end'], cutoff_date)
+        lo = bisect.bisect_left(dates, period_info['start'].date())
+        hi = bisect.bisect_right(dates, end_date.date())
+        slices.append(rows[lo:hi])
+    return slices
+
+
+def get_period_stats(conn, start_date, end_date, period_type: str = None, period_id: str = None,
+                     daily_rows: Optional[List[tuple]] = None) -> Dict[str, Any]:
+    """Get stats for a specific period using archived + live daily stats"""
+    if daily_rows is None:
+        daily_rows = get_period_daily_rows(conn, start_date, end_date)
+
+    total_searches = sum(row[2] for row in daily_rows)
+    if total_searches == 0:
+        return None
+
+    total_users = sum(row[3] for row in daily_rows)
+    first_date = daily_rows[0][1]
+    last_date = daily_rows[-1][1]
+
+    # Per-client totals
+    client_totals = defaultdict(int)
+    for client_id, _, search_count, _ in daily_rows:
+        client_totals[client_id] += search_count
+    client_totals = dict(client_totals)
+
     # Get precomputed stats from period_summary_stats (correct distinct counts)
     summary_row = None
     if period_type and period_id:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT unique_queries, unique_pairs, total_searches, total_users
-            FROM period_summary_stats
-            WHERE period_type = %s AND period_id = %s
-        """, (period_type, period_id))
+        _execute_prepared(cursor, 'period_summary', (period_type, period_id))
         summary_row = cursor.fetchone()
         cursor.close()
 
@@ -374,18 +419,13 @@ def get_period_top_queries(conn, period_type: str, period_id: str) -> List[tuple
         List of (query_normalized, unique_users, total_searches) tuples
     """
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT query_normalized, unique_users, total_searches
-        FROM period_top_queries
-        WHERE period_type = %s AND period_id = %s
-        ORDER BY rank
-    """, (period_type, period_id))
+    _execute_prepared(cursor, 'period_top_queries', (period_type, period_id))
     rows = cursor.fetchall()
     cursor.close()
     return rows
 
 
-def get_period_query_length_dist(conn, period_type: str, period_id: str) -> pd.DataFrame:
+def get_period_query_length_dist(conn, period_type: str, period_id: str) -> List[tuple]:
     """Get query length distribution for a specific period from precomputed table.
 
     Args:
@@ -394,22 +434,13 @@ def get_period_query_length_dist(conn, period_type: str, period_id: str) -> pd.D
         period_id: Period identifier like '2026-01' or '2026-W04'
 
     Returns:
-        DataFrame with query_length and count columns
+        List of (query_length, count) tuples ordered by length
     """
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT query_length, unique_query_count as count
-        FROM period_query_length_dist
-        WHERE period_type = %s AND period_id = %s
-        ORDER BY query_length
-    """, (period_type, period_id))
+    _execute_prepared(cursor, 'period_length_dist', (period_type, period_id))
     rows = cursor.fetchall()
     cursor.close()
-
-    if not rows:
-        return pd.DataFrame(columns=['query_length', 'count'])
-
-    return pd.DataFrame(rows, columns=['query_length', 'count'])
+    return rows
 
 
 def load_article_content(article_path: str = 'docs/article.md') -> Optional[str]:
@@ -420,37 +451,32 @@ def load_article_content(article_path: str = 'docs/article.md') -> Optional[str]
     return None
 
 
+ARTICLE_MARKER_PATTERN = re.compile(
+    r'<!--\s*(?:chart:\s*(?P<chart>\w+)|(?P<stats_grid>stats-grid)'
+    r'|(?P<cumulative_stats>cumulative-stats))\s*-->'
+)
+
+
 def parse_article_sections(markdown_content: str) -> List[Dict[str, Any]]:
     """Parse Markdown into sections with chart markers identified."""
     sections = []
-    pattern = r'(<!--\s*chart:\s*(\w+)\s*-->|<!--\s*stats-grid\s*-->|<!--\s*cumulative-stats\s*-->)'
-    parts = re.split(pattern, markdown_content)
     md_parser = mistune.create_markdown()
 
-    i = 0
-    while i < len(parts):
-        part = parts[i] if i < len(parts) else ''
-        if part and part.strip():
-            if '<!-- chart:' in part:
-                if i + 1 < len(parts):
-                    chart_id = parts[i + 1].strip()
-                    sections.append({'type': 'chart', 'chart_id': chart_id})
-                    i += 2
-                else:
-                    i += 1
-            elif '<!-- stats-grid -->' in part:
-                sections.append({'type': 'stats-grid'})
-                i += 1
-            elif '<!-- cumulative-stats -->' in part:
-                sections.append({'type': 'cumulative-stats'})
-                i += 1
-            else:
-                html = md_parser(part)
-                if html.strip():
-                    sections.append({'type': 'prose', 'content': html})
-                i += 1
+    def add_prose(part: str):
+        if part.strip():
+            html = md_parser(part)
+            if html.strip():
+                sections.append({'type': 'prose', 'content': html})
+
+    pos = 0
+    for match in ARTICLE_MARKER_PATTERN.finditer(markdown_content):
+        add_prose(markdown_content[pos:match.start()])
+        if match['chart']:
+            sections.append({'type': 'chart', 'chart_id': match['chart']})
         else:
-            i += 1
+            sections.append({'type': match.lastgroup.replace('_', '-')})
+        pos = match.end()
+    add_prose(markdown_content[pos:])
     return sections
 
 
@@ -573,65 +599,93 @@ def create_svg_line_chart(daily_data: List[tuple]) -> str:
     return svg
 
 
+# Shared chart styling (plotly_white, white backgrounds, black text), built
+# once at import and reused by every chart builder instead of re-specifying
+# the same layout properties on each figure
+DASHBOARD_TEMPLATE = go.layout.Template(pio.templates['plotly_white'])
+DASHBOARD_TEMPLATE.layout.update(
+    plot_bgcolor='white',
+    paper_bgcolor='white',
+    font=dict(color='black'),
+)
+
+# Static per-chart layouts, built once and handed to every figure of that
+# chart type; only data-dependent properties are set per call
+DAILY_FLOW_LAYOUT = go.Layout(
+    title='Daily Search Volume by Client - Raw Data Collection',
+    xaxis=dict(title='Date', rangeslider=dict(visible=True), type='date'),
+    yaxis_title='Number of Searches (Raw)',
+    hovermode='x unified',
+    height=500,
+    template=DASHBOARD_TEMPLATE,
+)
+
+DAILY_UNIQUE_USERS_LAYOUT = go.Layout(
+    title='Daily Active Users - Deduplicated',
+    xaxis=dict(title='Date', rangeslider=dict(visible=True), type='date'),
+    yaxis_title='Unique Users',
+    hovermode='x unified',
+    height=400,
+    template=DASHBOARD_TEMPLATE,
+)
+
+TOP_QUERIES_LAYOUT = go.Layout(
+    xaxis_title='Number of Unique Users',
+    yaxis=dict(title='Query', tickmode='linear', tickfont=dict(size=10)),
+    template=DASHBOARD_TEMPLATE,
+)
+
+QUERY_LENGTH_LAYOUT = go.Layout(
+    title='Search Query Length Distribution (Words)',
+    xaxis_title='Query Length (Number of Words)',
+    yaxis_title='Number of Unique Queries',
+    height=400,
+    template=DASHBOARD_TEMPLATE,
+)
+
+CLIENT_DISTRIBUTION_LAYOUT = go.Layout(
+    title='Search Distribution by Geographic Client - Raw Data Collection',
+    height=400,
+    template=DASHBOARD_TEMPLATE,
+)
+
+
 def create_daily_flow_chart(df: pd.DataFrame) -> go.Figure:
     """Create line chart showing daily search flow per client"""
-    fig = go.Figure()
-    clients = df['client_id'].unique()
+    fig = go.Figure(layout=DAILY_FLOW_LAYOUT)
     greys = ['#000000', '#555555', '#999999', '#333333', '#777777']
 
+    # One sort and one grouping pass for the whole frame instead of a mask
+    # and a sort per client; traces keep the clients' order of appearance
+    clients = df['client_id'].unique()
+    by_client = dict(tuple(df.sort_values('date', kind='stable').groupby('client_id', sort=False)))
     for i, client in enumerate(clients):
-        client_data = df[df['client_id'] == client].sort_values('date')
+        client_data = by_client[client]
         fig.add_trace(go.Scatter(
-            x=client_data['date'],
-            y=client_data['search_count'],
+            x=client_data['date'].to_numpy(),
+            y=client_data['search_count'].to_numpy(),
             mode='lines+markers',
             name=client,
             line=dict(width=2, color=greys[i % len(greys)]),
             marker=dict(size=8, color=greys[i % len(greys)])
         ))
-
-    fig.update_layout(
-        title='Daily Search Volume by Client - Raw Data Collection',
-        xaxis_title='Date',
-        yaxis_title='Number of Searches (Raw)',
-        hovermode='x unified',
-        height=500,
-        template='plotly_white',
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(color='black'),
-        xaxis=dict(rangeslider=dict(visible=True), type='date')
-    )
     return fig
 
 
-def create_daily_unique_users_chart(df: pd.DataFrame) -> go.Figure:
+def create_daily_unique_users_chart(daily_users: List[tuple]) -> go.Figure:
     """Create line chart showing daily unique users trend"""
-    df_sorted = df.sort_values('date')
-    fig = go.Figure()
+    dates, unique_users = zip(*sorted(daily_users))
+    fig = go.Figure(layout=DAILY_UNIQUE_USERS_LAYOUT)
 
     fig.add_trace(go.Scatter(
-        x=df_sorted['date'],
-        y=df_sorted['unique_users'],
+        x=np.array(dates, dtype=object),
+        y=np.array(unique_users),
         mode='lines+markers',
         line=dict(width=3, color='#333333'),
         marker=dict(size=10, color='#333333', line=dict(color='black', width=1)),
         fill='tozeroy',
         fillcolor='rgba(51, 51, 51, 0.1)'
     ))
-
-    fig.update_layout(
-        title='Daily Active Users - Deduplicated',
-        xaxis_title='Date',
-        yaxis_title='Unique Users',
-        hovermode='x unified',
-        height=400,
-        template='plotly_white',
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(color='black'),
-        xaxis=dict(rangeslider=dict(visible=True), type='date')
-    )
     return fig
 
 
@@ -660,24 +714,11 @@ def create_top_queries_chart(top_queries: List[tuple], limit: int = 25) -> go.Fi
             customdata=queries[::-1],  # Store full query for search
             hovertemplate='<b>%{customdata}</b><br>Unique Users: %{x}<extra></extra>'
         )
-    ])
+    ], layout=TOP_QUERIES_LAYOUT)
 
     title_text = f'Top {limit:,} Queries (of {total_count:,} total with 5+ users)'
 
-    fig.update_layout(
-        title=title_text,
-        xaxis_title='Number of Unique Users',
-        yaxis_title='Query',
-        height=chart_height,
-        template='plotly_white',
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(color='black'),
-        yaxis=dict(
-            tickmode='linear',
-            tickfont=dict(size=10)
-        )
-    )
+    fig.update_layout(title=title_text, height=chart_height)
     return fig
 
 
@@ -1184,28 +1225,18 @@ def create_queries_data_table(top_queries: List[tuple], data_json_url: str) -> s
     '''
 
 
-def create_query_length_chart(df: pd.DataFrame) -> go.Figure:
+def create_query_length_chart(length_dist: List[tuple]) -> go.Figure:
     """Create histogram of query length distribution (by word count)"""
-    df_filtered = df[df['query_length'] <= 100]
+    lengths, counts = (np.array(col) for col in zip(*length_dist))
+    mask = lengths <= 100
 
     fig = go.Figure(data=[
         go.Bar(
-            x=df_filtered['query_length'],
-            y=df_filtered['count'],
+            x=lengths[mask],
+            y=counts[mask],
             marker=dict(color='#444444', line=dict(color='black', width=1))
         )
-    ])
-
-    fig.update_layout(
-        title='Search Query Length Distribution (Words)',
-        xaxis_title='Query Length (Number of Words)',
-        yaxis_title='Number of Unique Queries',
-        height=400,
-        template='plotly_white',
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(color='black')
-    )
+    ], layout=QUERY_LENGTH_LAYOUT)
     return fig
 
 
@@ -1220,56 +1251,82 @@ def create_client_distribution_chart(client_totals: Dict[str, int]) -> go.Figure
             hole=0.3,
             marker=dict(colors=grey_palette, line=dict(color='white', width=2))
         )
-    ])
-
-    fig.update_layout(
-        title='Search Distribution by Geographic Client - Raw Data Collection',
-        height=400,
-        template='plotly_white',
-        paper_bgcolor='white',
-        font=dict(color='black')
-    )
+    ], layout=CLIENT_DISTRIBUTION_LAYOUT)
     return fig
 
 
-def generate_stats_grid_html(stats: Dict) -> str:
-    """Generate the stats summary cards HTML."""
-    days = format_days(stats['first_search'], stats['last_search'])
-
-    return f'''
+STATS_GRID_TEMPLATE = string.Template('''
         <div class="stats-grid">
             <div class="stat-card">
                 <h3>Total Search Events</h3>
-                <div class="value">{stats['total_searches']:,}</div>
+                <div class="value">${total_searches}</div>
                 <div class="label">Raw search requests received</div>
             </div>
             <div class="stat-card">
                 <h3>Unique Users</h3>
-                <div class="value">{stats['total_users']:,}</div>
+                <div class="value">${total_users}</div>
                 <div class="label">Anonymized users</div>
             </div>
             <div class="stat-card">
                 <h3>Unique Queries</h3>
-                <div class="value">{stats['total_queries']:,}</div>
+                <div class="value">${total_queries}</div>
                 <div class="label">Different search terms</div>
             </div>
             <div class="stat-card">
                 <h3>Avg Searches per User</h3>
-                <div class="value">{stats['avg_searches_per_user']:.1f}</div>
+                <div class="value">${avg_searches_per_user}</div>
                 <div class="label">Including repeated searches</div>
             </div>
             <div class="stat-card">
                 <h3>Avg Unique Queries per User</h3>
-                <div class="value">{stats['avg_unique_queries_per_user']:.1f}</div>
+                <div class="value">${avg_unique_queries_per_user}</div>
                 <div class="label">Search diversity</div>
             </div>
             <div class="stat-card">
                 <h3>Collection Period</h3>
-                <div class="value">{days}</div>
+                <div class="value">${days}</div>
                 <div class="label">Days of data</div>
             </div>
         </div>
-    '''
+    ''')
+
+STATS_TABLES_TEMPLATE = string.Template('''
+        <div class="stats-tables">
+            <table class="stats-table">
+                <caption>Volume</caption>
+                <tbody>
+                    <tr><td class="stats-label">Total Searches</td><td class="stats-value">${total_searches}</td></tr>
+                    <tr><td class="stats-label">Unique Users</td><td class="stats-value">${total_users}</td></tr>
+                    <tr><td class="stats-label">Unique Queries</td><td class="stats-value">${total_queries}</td></tr>
+                    <tr><td class="stats-label">Period</td><td class="stats-value">${days} days</td></tr>
+                </tbody>
+            </table>
+            <table class="stats-table">
+                <caption>Per User</caption>
+                <tbody>
+                    <tr><td class="stats-label">Avg Searches</td><td class="stats-value">${avg_searches_per_user}</td></tr>
+                    <tr><td class="stats-label">Avg Unique Queries</td><td class="stats-value">${avg_unique_queries_per_user}</td></tr>
+                </tbody>
+            </table>
+        </div>
+    ''')
+
+
+def _stats_template_values(stats: Dict) -> Dict[str, str]:
+    """Formatted summary values shared by the stats grid and stats tables."""
+    return {
+        'total_searches': f"{stats['total_searches']:,}",
+        'total_users': f"{stats['total_users']:,}",
+        'total_queries': f"{stats['total_queries']:,}",
+        'avg_searches_per_user': f"{stats['avg_searches_per_user']:.1f}",
+        'avg_unique_queries_per_user': f"{stats['avg_unique_queries_per_user']:.1f}",
+        'days': format_days(stats['first_search'], stats['last_search']),
+    }
+
+
+def generate_stats_grid_html(stats: Dict) -> str:
+    """Generate the stats summary cards HTML."""
+    return STATS_GRID_TEMPLATE.substitute(_stats_template_values(stats))
 
 
 def get_available_periods(conn, max_date=None) -> Dict[str, List[Dict]]:
@@ -1282,13 +1339,13 @@ def get_available_periods(conn, max_date=None) -> Dict[str, List[Dict]]:
 
     # Get weeks from period_summary_stats
     cursor.execute("""
-        SELECT period_id, first_date, last_date
+        SELECT period_id
         FROM period_summary_stats
         WHERE period_type = 'week'
         ORDER BY period_id
     """)
     weeks = []
-    for period_id, first_date, last_date in cursor.fetchall():
+    for (period_id,) in cursor.fetchall():
         # period_id is like "2026-W03"
         parts = period_id.split('-W')
         iso_year, iso_week = int(parts[0]), int(parts[1])
@@ -1299,13 +1356,13 @@ def get_available_periods(conn, max_date=None) -> Dict[str, List[Dict]]:
 
     # Get months from period_summary_stats
     cursor.execute("""
-        SELECT period_id, first_date, last_date
+        SELECT period_id
         FROM period_summary_stats
         WHERE period_type = 'month'
         ORDER BY period_id
     """)
     months = []
-    for period_id, first_date, last_date in cursor.fetchall():
+    for (period_id,) in cursor.fetchall():
         # period_id is like "2026-01"
         year, month = int(period_id[:4]), int(period_id[5:7])
         month_start = datetime(year, month, 1, tzinfo=timezone.utc)
@@ -1333,14 +1390,16 @@ def generate_jekyll_data_files(periods: Dict[str, List[Dict]]):
 
     months_data = [{'id': m['id'], 'label': m['label']} for m in reversed(periods['months'])]
     with open('docs/_data/months.yml', 'w', encoding='utf-8') as f:
-        yaml.dump(months_data, f, default_flow_style=False, allow_unicode=True)
+        yaml.dump(months_data, f, Dumper=YAML_DUMPER, default_flow_style=False, allow_unicode=True)
 
     weeks_data = [{'id': w['id'], 'label': w['label']} for w in reversed(periods['weeks'])]
     with open('docs/_data/weeks.yml', 'w', encoding='utf-8') as f:
-        yaml.dump(weeks_data, f, default_flow_style=False, allow_unicode=True)
+        yaml.dump(weeks_data, f, Dumper=YAML_DUMPER, default_flow_style=False, allow_unicode=True)
 
 
-def generate_all_time_page(conn, cutoff_date=None, query_slug_map=None, blacklist=None) -> str:
+def generate_all_time_page(conn, cutoff_date=None, query_slug_map=None, blacklist=None,
+                           top_queries: Optional[List[tuple]] = None,
+                           generated_at: Optional[datetime] = None) -> str:
     """Generate the all-time dashboard page using cumulative stats + materialized views"""
     print("  Computing all-time statistics from cumulative + live data...")
 
@@ -1363,40 +1422,42 @@ def generate_all_time_page(conn, cutoff_date=None, query_slug_map=None, blacklis
     print("  Loading chart data from materialized views...")
     daily_stats = get_daily_stats(conn, end_date=cutoff_date)
     daily_unique_users = get_daily_unique_users(conn, end_date=cutoff_date)
-    top_queries = get_top_queries(conn)
-    if blacklist:
-        top_queries = [q for q in top_queries if not is_blacklisted(q[0], blacklist)]
+    if top_queries is None:
+        top_queries = get_top_queries(conn)
+        if blacklist:
+            top_queries = [q for q in top_queries if not is_blacklisted(q[0], blacklist)]
     query_length_dist = get_query_length_distribution(conn)
 
     # Create figures
     figures = {
         'daily_flow': create_daily_flow_chart(daily_stats) if not daily_stats.empty else None,
-        'daily_unique_users': create_daily_unique_users_chart(daily_unique_users) if not daily_unique_users.empty else None,
+        'daily_unique_users': create_daily_unique_users_chart(daily_unique_users) if daily_unique_users else None,
         'client_distribution': create_client_distribution_chart(stats['client_totals']) if stats['client_totals'] else None,
         'top_queries': create_top_queries_chart(top_queries) if top_queries else None,
-        'query_length': create_query_length_chart(query_length_dist) if not query_length_dist.empty else None
+        'query_length': create_query_length_chart(query_length_dist) if query_length_dist else None
     }
 
-    # Check for article mode
-    article_content = load_article_content('docs/article.md')
-    if article_content:
-        print("  Using article mode for all-time page")
-        sections = parse_article_sections(article_content)
-        html = generate_article_html_with_jekyll(stats, figures, sections, top_queries_data=top_queries, query_slug_map=query_slug_map, data_file_id='all')
-    else:
-        html = generate_period_html(stats, figures, 'all', None, top_queries_data=top_queries, query_slug_map=query_slug_map, data_file_id='all')
-
     output_file = "docs/index.html"
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    # Check for article mode
+    article_content = load_article_content('docs/article.md')
     with open(output_file, 'w') as f:
-        f.write(html)
+        if article_content:
+            print("  Using article mode for all-time page")
+            sections = parse_article_sections(article_content)
+            generate_article_html_with_jekyll(f, stats, figures, sections, top_queries_data=top_queries, query_slug_map=query_slug_map, data_file_id='all', generated_at=generated_at)
+        else:
+            generate_period_html(f, stats, figures, 'all', None, top_queries_data=top_queries, query_slug_map=query_slug_map, data_file_id='all', generated_at=generated_at)
 
     print(f"  Generated {output_file}")
     return output_file
 
 
 def generate_period_page(conn, period_type: str, period_info: Dict, cutoff_date=None,
-                         query_slug_map=None, blacklist=None) -> Optional[str]:
+                         query_slug_map=None, blacklist=None,
+                         daily_rows: Optional[List[tuple]] = None,
+                         generated_at: Optional[datetime] = None) -> Optional[str]:
     """Generate a dashboard page for a specific period"""
     period_label = period_info['label']
     period_id = period_info['id']
@@ -1407,16 +1468,24 @@ def generate_period_page(conn, period_type: str, period_info: Dict, cutoff_date=
         end_date = cutoff_date
 
     # Get stats for this period
-    stats = get_period_stats(conn, start_date, end_date, period_type, period_id)
+    if daily_rows is None:
+        daily_rows = get_period_daily_rows(conn, start_date, end_date)
+    stats = get_period_stats(conn, start_date, end_date, period_type, period_id,
+                             daily_rows=daily_rows)
     if stats is None:
         print(f"  No data for {period_label}, skipping")
         return None
 
     print(f"  Found {stats['total_searches']:,} searches for {period_label}")
 
-    # Get chart data (using precomputed tables for top_queries and query_length_dist)
-    daily_stats = get_daily_stats(conn, start_date, end_date)
-    daily_unique_users = get_daily_unique_users(conn, start_date, end_date)
+    # Get chart data (daily charts from the period's daily rows, precomputed
+    # tables for top_queries and query_length_dist)
+    daily_stats = pd.DataFrame([row[:3] for row in daily_rows],
+                               columns=['client_id', 'date', 'search_count'])
+    daily_max_users = {}
+    for _, day, _, unique_users in daily_rows:
+        daily_max_users[day] = max(unique_users, daily_max_users.get(day, unique_users))
+    daily_unique_users = list(daily_max_users.items())
     top_queries = get_period_top_queries(conn, period_type, period_id)
     if blacklist:
         top_queries = [q for q in top_queries if not is_blacklisted(q[0], blacklist)]
@@ -1425,68 +1494,48 @@ def generate_period_page(conn, period_type: str, period_info: Dict, cutoff_date=
     # Create figures
     figures = {
         'daily_flow': create_daily_flow_chart(daily_stats) if not daily_stats.empty else None,
-        'daily_unique_users': create_daily_unique_users_chart(daily_unique_users) if not daily_unique_users.empty else None,
+        'daily_unique_users': create_daily_unique_users_chart(daily_unique_users) if daily_unique_users else None,
         'client_distribution': create_client_distribution_chart(stats['client_totals']) if stats['client_totals'] else None,
         'top_queries': create_top_queries_chart(top_queries) if top_queries else None,
-        'query_length': create_query_length_chart(query_length_dist) if not query_length_dist.empty else None
+        'query_length': create_query_length_chart(query_length_dist) if query_length_dist else None
     }
 
-    # Generate HTML
-    html = generate_period_html(stats, figures, period_type, period_info, top_queries_data=top_queries, query_slug_map=query_slug_map, data_file_id=period_info['id'])
-
     # Determine output path
     if period_type == 'week':
         output_file = f"docs/weeks/{period_info['id']}.html"
     else:  # month
         output_file = f"docs/months/{period_info['id']}.html"
 
+    # Generate HTML straight into the output file
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     with open(output_file, 'w') as f:
-        f.write(html)
+        generate_period_html(f, stats, figures, period_type, period_info, top_queries_data=top_queries, query_slug_map=query_slug_map, data_file_id=period_info['id'], generated_at=generated_at)
 
     print(f"  Generated {output_file}")
     return output_file
 
 
-def generate_article_html_with_jekyll(stats: Dict, figures: Dict[str, go.Figure],
-                                      sections: List[Dict[str, Any]], top_queries_data: List[tuple] = None,
-                                      query_slug_map: Dict[str, str] = None,
-                                      data_file_id: str = 'all') -> str:
-    """Generate article mode HTML with Jekyll front matter"""
-    front_matter = "---\nlayout: dashboard\nperiod: all\ntitle: All Time Statistics\n---\n\n"
-
-    chart_html = {}
-    for name, fig in figures.items():
-        if fig is not None:
-            # For top_queries, combine chart + table
-            if name == 'top_queries' and top_queries_data:
-                chart_part = fig.to_html(full_html=False, include_plotlyjs=False)
-                data_json_url = f'data/queries_{data_file_id}.json'
-                write_queries_data_file(top_queries_data, f'docs/{data_json_url}', query_slug_map)
-                table_part = create_queries_data_table(top_queries_data, data_json_url)
-                chart_html[name] = f'{chart_part}\n{table_part}'
-            else:
-                chart_html[name] = fig.to_html(full_html=False, include_plotlyjs=False)
-        else:
-            chart_html[name] = '<p>Not enough data for visualization</p>'
+def _write_top_queries_data(figures: Dict[str, go.Figure], top_queries_data: List[tuple],
+                            query_slug_map: Dict[str, str], data_file_id: str) -> None:
+    """Write the JSON data file backing the top queries table, if the page has one."""
+    if figures.get('top_queries') is not None and top_queries_data:
+        write_queries_data_file(top_queries_data, f'docs/data/queries_{data_file_id}.json', query_slug_map)
 
-    body_parts = []
-    for section in sections:
-        if section['type'] == 'prose':
-            body_parts.append(f'<div class="prose">{section["content"]}</div>')
-        elif section['type'] == 'chart':
-            chart_id = section['chart_id']
-            if chart_id in chart_html:
-                body_parts.append(f'<div class="chart">{chart_html[chart_id]}</div>')
-            else:
-                print(f"Warning: Unknown chart ID '{chart_id}' in article.md")
-                body_parts.append(f'<p style="color: #999; font-style: italic;">Chart not found: {chart_id}</p>')
-        elif section['type'] == 'stats-grid':
-            body_parts.append(generate_stats_grid_html(stats))
 
-    body_content = '\n'.join(body_parts)
+def _render_chart_html(name: str, fig: Optional[go.Figure], top_queries_data: List[tuple],
+                       data_file_id: str, empty_html: str) -> str:
+    """Render a single chart fragment; called at write time so only one is held in memory."""
+    if fig is None:
+        return empty_html
+    chart_part = fig.to_html(full_html=False, include_plotlyjs=False)
+    # For top_queries, combine chart + table
+    if name == 'top_queries' and top_queries_data:
+        table_part = create_queries_data_table(top_queries_data, f'data/queries_{data_file_id}.json')
+        return f'{chart_part}\n{table_part}'
+    return chart_part
 
-    article_css = '''
+
+ARTICLE_CSS = '''
     <style>
         .prose { max-width: 800px; margin: 0 auto 30px auto; line-height: 1.7; color: #333; }
         .prose p { margin: 1em 0; font-size: 16px; }
@@ -1505,6 +1554,62 @@ def generate_article_html_with_jekyll(stats: Dict, figures: Dict[str, go.Figure]
     </style>
     '''
 
+ARTICLE_HEADER_TEMPLATE = string.Template('''${article_css}
+<h1>All Time Statistics</h1>
+<p class="period-range">${date_range}</p>
+<p class="timestamp">Last updated: ${updated}</p>
+
+''')
+
+PERIOD_HEADER_TEMPLATE = string.Template('''<h1>${period_title}</h1>
+<p class="period-range">${date_range}</p>
+<p class="timestamp">Last updated: ${updated}</p>
+
+<h2>Summary Statistics</h2>
+${stats_grid}
+''')
+
+
+# Per-process state for page workers, set once by _init_page_worker
+_page_worker_args: Dict[str, Any] = {}
+
+
+def _init_page_worker(cutoff_date, query_slug_map, blacklist, generated_at):
+    """ProcessPoolExecutor initializer: ship the shared lookups to each worker once.
+
+    Each worker also opens one DB connection for all of its pages, so the
+    period queries prepared on it are reused across pages.
+    """
+    _page_worker_args.update(cutoff_date=cutoff_date, query_slug_map=query_slug_map,
+                             blacklist=blacklist, generated_at=generated_at)
+    conn = get_db_connection()
+    _page_worker_args['conn'] = conn
+    # Runs when the worker process exits (atexit does not in pool workers)
+    multiprocessing.util.Finalize(conn, conn.close, exitpriority=10)
+
+
+def _generate_period_page_job(job: Tuple[str, Dict, List[tuple]]) -> Optional[str]:
+    """Generate one (period_type, period_info, daily_rows) page in a worker process on its own DB connection."""
+    period_type, period_info, daily_rows = job
+    if period_type == 'month':
+        print(f"GENERATING MONTHLY PAGE: {period_info['label']}")
+    else:
+        print(f"GENERATING WEEKLY PAGE: CW {period_info['label']}")
+    args = dict(_page_worker_args)
+    return generate_period_page(args.pop('conn'), period_type, period_info,
+                                daily_rows=daily_rows, **args)
+
+
+def generate_article_html_with_jekyll(f: TextIO, stats: Dict, figures: Dict[str, go.Figure],
+                                      sections: List[Dict[str, Any]], top_queries_data: List[tuple] = None,
+                                      query_slug_map: Dict[str, str] = None,
+                                      data_file_id: str = 'all',
+                                      generated_at: Optional[datetime] = None) -> None:
+    """Write article mode HTML with Jekyll front matter to an open file"""
+    f.write("---\nlayout: dashboard\nperiod: all\ntitle: All Time Statistics\n---\n\n")
+
+    _write_top_queries_data(figures, top_queries_data, query_slug_map, data_file_id)
+
     if stats['first_search'] and stats['last_search']:
         first_dt = datetime.fromisoformat(stats['first_search'])
         last_dt = datetime.fromisoformat(stats['last_search'])
@@ -1512,22 +1617,60 @@ def generate_article_html_with_jekyll(stats: Dict, figures: Dict[str, go.Figure]
     else:
         date_range_str = "No data"
 
-    content = f'''{article_css}
-<h1>All Time Statistics</h1>
-<p class="period-range">{date_range_str}</p>
-<p class="timestamp">Last updated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-
-{body_content}
-'''
-    return front_matter + content
-
+    f.write(ARTICLE_HEADER_TEMPLATE.substitute(
+        article_css=ARTICLE_CSS,
+        date_range=date_range_str,
+        updated=(generated_at or datetime.now(timezone.utc)).strftime('%Y-%m-%d %H:%M:%S UTC'),
+    ))
 
-def generate_period_html(stats: Dict, figures: Dict[str, go.Figure],
+    separator = ''
+    for section in sections:
+        if section['type'] == 'prose':
+            part = f'<div class="prose">{section["content"]}</div>'
+        elif section['type'] == 'chart':
+            chart_id = section['chart_id']
+            if chart_id in figures:
+                chart = _render_chart_html(chart_id, figures[chart_id], top_queries_data, data_file_id,
+                                           '<p>Not enough data for visualization</p>')
+                part = f'<div class="chart">{chart}</div>'
+            else:
+                print(f"Warning: Unknown chart ID '{chart_id}' in article.md")
+                part = f'<p style="color: #999; font-style: italic;">Chart not found: {chart_id}</p>'
+        elif section['type'] == 'stats-grid':
+            part = generate_stats_grid_html(stats)
+        else:
+            continue
+        f.write(separator)
+        f.write(part)
+        separator = '\n'
+    f.write('\n')
+
+
+# Chart sections of a period page, in page order: (heading HTML, chart name)
+PERIOD_CHART_SECTIONS = [
+    ('''<h2>User Activity Trends <span style="font-weight: normal; font-size: 14px; color: #999;">(Unique Users per Day)</span></h2>\n''',
+     'daily_unique_users'),
+    ('''<h2>Top Search Terms <span style="font-weight: normal; font-size: 14px; color: #999;">(Count once per user)</span> <span class="info-icon" onclick="this.classList.toggle('open')">i<span class="info-tooltip">Queries are ranked by unique users, not raw search count. Only queries with 5 or more unique users are shown. Query detail pages are available for queries with 35 or more unique users.</span></span></h2>\n''',
+     'top_queries'),
+    ('''<h2>Query Length Distribution <span style="font-weight: normal; font-size: 14px; color: #999;">(Unique Queries)</span></h2>\n''',
+     'query_length'),
+    ('''<h2>Data Collection Overview <span style="font-weight: normal; font-size: 14px; color: #999;">(Raw Counts)</span> <span class="info-icon" onclick="this.classList.toggle('open')">i<span class="info-tooltip">Total search events show the raw count of search requests received by the research client, including duplicate queries by the same user(s). Top queries are ranked by unique users, not raw event count.</span></span></h2>\n''',
+     'daily_flow'),
+    ('', 'client_distribution'),
+]
+
+
+def generate_period_html(f: TextIO, stats: Dict, figures: Dict[str, go.Figure],
                          period_type: str, period_info: Optional[Dict] = None,
                          top_queries_data: List[tuple] = None,
                          query_slug_map: Dict[str, str] = None,
-                         data_file_id: str = 'all') -> str:
-    """Generate HTML for a period page with Jekyll front matter"""
+                         data_file_id: str = 'all',
+                         generated_at: Optional[datetime] = None) -> None:
+    """Write HTML for a period page with Jekyll front matter to an open file.
+
+    Chart fragments are rendered one at a time as they are written, so the
+    full page never has to be held in memory.
+    """
     if period_type == 'all':
         front_matter = "---\nlayout: dashboard\nperiod: all\ntitle: All Time Statistics\n---\n\n"
         period_title = "All Time Statistics"
@@ -1538,43 +1681,7 @@ def generate_period_html(stats: Dict, figures: Dict[str, go.Figure],
         front_matter = f"---\nlayout: dashboard\nperiod: month\nperiod_id: {period_info['id']}\ntitle: {period_info['label']}\n---\n\n"
         period_title = period_info['label']
 
-    chart_html = {}
-    for name, fig in figures.items():
-        if fig is not None:
-            # For top_queries, combine chart + table
-            if name == 'top_queries' and top_queries_data:
-                chart_part = fig.to_html(full_html=False, include_plotlyjs=False)
-                data_json_url = f'data/queries_{data_file_id}.json'
-                write_queries_data_file(top_queries_data, f'docs/{data_json_url}', query_slug_map)
-                table_part = create_queries_data_table(top_queries_data, data_json_url)
-                chart_html[name] = f'{chart_part}\n{table_part}'
-            else:
-                chart_html[name] = fig.to_html(full_html=False, include_plotlyjs=False)
-        else:
-            chart_html[name] = '<p style="color: #999">Not enough data for visualization</p>'
-
-    days = format_days(stats['first_search'], stats['last_search'])
-
-    stats_grid = f'''
-        <div class="stats-tables">
-            <table class="stats-table">
-                <caption>Volume</caption>
-                <tbody>
-                    <tr><td class="stats-label">Total Searches</td><td class="stats-value">{stats['total_searches']:,}</td></tr>
-                    <tr><td class="stats-label">Unique Users</td><td class="stats-value">{stats['total_users']:,}</td></tr>
-                    <tr><td class="stats-label">Unique Queries</td><td class="stats-value">{stats['total_queries']:,}</td></tr>
-                    <tr><td class="stats-label">Period</td><td class="stats-value">{days} days</td></tr>
-                </tbody>
-            </table>
-            <table class="stats-table">
-                <caption>Per User</caption>
-                <tbody>
-                    <tr><td class="stats-label">Avg Searches</td><td class="stats-value">{stats['avg_searches_per_user']:.1f}</td></tr>
-                    <tr><td class="stats-label">Avg Unique Queries</td><td class="stats-value">{stats['avg_unique_queries_per_user']:.1f}</td></tr>
-                </tbody>
-            </table>
-        </div>
-    '''
+    _write_top_queries_data(figures, top_queries_data, query_slug_map, data_file_id)
 
     if stats['first_search'] and stats['last_search']:
         first_dt = datetime.fromisoformat(stats['first_search'])
@@ -1583,38 +1690,18 @@ def generate_period_html(stats: Dict, figures: Dict[str, go.Figure],
     else:
         date_range_str = "No data"
 
-    content = f'''<h1>{period_title}</h1>
-<p class="period-range">{date_range_str}</p>
-<p class="timestamp">Last updated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-
-<h2>Summary Statistics</h2>
-{stats_grid}
-
-<h2>User Activity Trends <span style="font-weight: normal; font-size: 14px; color: #999;">(Unique Users per Day)</span></h2>
-<div class="chart">
-    {chart_html.get('daily_unique_users', '<p>Not enough data</p>')}
-</div>
-
-<h2>Top Search Terms <span style="font-weight: normal; font-size: 14px; color: #999;">(Count once per user)</span> <span class="info-icon" onclick="this.classList.toggle('open')">i<span class="info-tooltip">Queries are ranked by unique users, not raw search count. Only queries with 5 or more unique users are shown. Query detail pages are available for queries with 35 or more unique users.</span></span></h2>
-<div class="chart">
-    {chart_html.get('top_queries', '<p>Not enough data</p>')}
-</div>
-
-<h2>Query Length Distribution <span style="font-weight: normal; font-size: 14px; color: #999;">(Unique Queries)</span></h2>
-<div class="chart">
-    {chart_html.get('query_length', '<p>Not enough data</p>')}
-</div>
-
-<h2>Data Collection Overview <span style="font-weight: normal; font-size: 14px; color: #999;">(Raw Counts)</span> <span class="info-icon" onclick="this.classList.toggle('open')">i<span class="info-tooltip">Total search events show the raw count of search requests received by the research client, including duplicate queries by the same user(s). Top queries are ranked by unique users, not raw event count.</span></span></h2>
-<div class="chart">
-    {chart_html['daily_flow']}
-</div>
+    f.write(front_matter)
+    f.write(PERIOD_HEADER_TEMPLATE.substitute(
+        period_title=period_title,
+        date_range=date_range_str,
+        updated=(generated_at or datetime.now(timezone.utc)).strftime('%Y-%m-%d %H:%M:%S UTC'),
+        stats_grid=STATS_TABLES_TEMPLATE.substitute(_stats_template_values(stats)),
+    ))
 
-<div class="chart">
-    {chart_html.get('client_distribution', '<p>Not enough data</p>')}
-</div>
-'''
-    return front_matter + content
+    for heading, name in PERIOD_CHART_SECTIONS:
+        chart = _render_chart_html(name, figures.get(name), top_queries_data, data_file_id,
+                                   '<p style="color: #999">Not enough data for visualization</p>')
+        f.write(f'\n{heading}<div class="chart">\n    {chart}\n</div>\n')
 
 
 def compute_query_similarities(conn, eligible_queries: set, top_n: int = 20,
@@ -1637,32 +1724,43 @@ def compute_query_similarities(conn, eligible_queries: set, top_n: int = 20,
     t0 = time.time()
     print("  Loading user-query pairs from database...")
 
-    # Build index mappings and sparse matrix data in a single pass
-    query_to_idx = {}
-    user_to_idx = {}
-    rows, cols = [], []
-
-    cursor = conn.cursor('similarity_cursor')
-    cursor.itersize = 50000
-    cursor.execute("""
-        SELECT username, query_normalized
+    # Dense integer ids are assigned server-side (DENSE_RANK), so only int
+    # pairs cross the wire and no Python dict lookups run per pair. Query ids
+    # follow query_normalized order, matching the name list fetched below.
+    pair_filter = """
         FROM user_query_pairs
         WHERE query_normalized = ANY(%s)
           AND last_seen >= CURRENT_DATE - INTERVAL '90 days'
-    """, (list(eligible_queries),))
+    """
+    eligible_list = list(eligible_queries)
 
-    for username, query_norm in cursor:
-        if query_norm not in query_to_idx:
-            query_to_idx[query_norm] = len(query_to_idx)
-        if username not in user_to_idx:
-            user_to_idx[username] = len(user_to_idx)
-        rows.append(query_to_idx[query_norm])
-        cols.append(user_to_idx[username])
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT DISTINCT query_normalized {pair_filter} ORDER BY query_normalized",
+                   (eligible_list,))
+    idx_to_query = [row[0] for row in cursor.fetchall()]
+    cursor.close()
 
+    cursor = conn.cursor('similarity_cursor')
+    cursor.itersize = 50000
+    cursor.execute(f"""
+        SELECT DENSE_RANK() OVER (ORDER BY query_normalized) - 1,
+               DENSE_RANK() OVER (ORDER BY username) - 1
+        {pair_filter}
+    """, (eligible_list,))
+
+    pair_chunks = []
+    while True:
+        batch = cursor.fetchmany(cursor.itersize)
+        if not batch:
+            break
+        pair_chunks.append(np.array(batch, dtype=np.int64))
     cursor.close()
 
-    n_queries = len(query_to_idx)
-    n_users = len(user_to_idx)
+    pairs = np.concatenate(pair_chunks) if pair_chunks else np.empty((0, 2), dtype=np.int64)
+    rows, cols = pairs[:, 0], pairs[:, 1]
+
+    n_queries = len(idx_to_query)
+    n_users = int(cols.max()) + 1 if len(cols) else 0
     print(f"  Built index: {n_queries} queries x {n_users} users, {len(rows)} pairs "
           f"({time.time() - t0:.1f}s)")
 
@@ -1673,9 +1771,6 @@ def compute_query_similarities(conn, eligible_queries: set, top_n: int = 20,
     data = np.ones(len(rows), dtype=np.float32)
     matrix = csr_matrix((data, (rows, cols)), shape=(n_queries, n_users))
 
-    # Reverse mapping for output
-    idx_to_query = {idx: q for q, idx in query_to_idx.items()}
-
     # Compute similarities in chunks
     chunk_size = 500
     similarities = {}
@@ -1690,37 +1785,35 @@ def compute_query_similarities(conn, eligible_queries: set, top_n: int = 20,
         # Shared user counts: dot product of binary matrices
         shared_chunk = (chunk @ matrix.T).toarray()
 
-        for i in range(end - start):
-            global_idx = start + i
-            query = idx_to_query[global_idx]
-
-            # Zero out self-similarity
-            sim_chunk[i, global_idx] = 0.0
-
-            # Filter by min shared users
-            valid_mask = shared_chunk[i] >= min_shared_users
-            if not valid_mask.any():
-                continue
-
-            # Get top-N from valid entries
-            valid_indices = np.where(valid_mask)[0]
-            scores = sim_chunk[i, valid_indices]
-
-            if len(valid_indices) <= top_n:
-                top_local = np.argsort(-scores)
-            else:
-                top_local = np.argpartition(-scores, top_n)[:top_n]
-                top_local = top_local[np.argsort(-scores[top_local])]
-
-            result = []
-            for li in top_local:
-                gi = valid_indices[li]
-                score = float(scores[li])
-                if score <= 0:
-                    continue
-                result.append((idx_to_query[gi], score, int(shared_chunk[i, gi])))
-            if result:
-                similarities[query] = result
+        # Zero out self-similarity
+        rows_in_chunk = np.arange(end - start)
+        sim_chunk[rows_in_chunk, start + rows_in_chunk] = 0.0
+
+        # Filter by min shared users, then take the top-N of every row at
+        # once: one argpartition over the whole chunk instead of a Python
+        # loop of per-row selections
+        masked = np.where(shared_chunk >= min_shared_users, sim_chunk, -np.inf)
+        k = min(top_n, n_queries)
+        if k < n_queries:
+            top_idx = np.argpartition(-masked, k - 1, axis=1)[:, :k]
+        else:
+            top_idx = np.broadcast_to(np.arange(n_queries), masked.shape)
+        top_scores = np.take_along_axis(masked, top_idx, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top_idx = np.take_along_axis(top_idx, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top_shared = np.take_along_axis(shared_chunk, top_idx, axis=1)
+
+        # Invalid entries are -inf, so this also drops rows with no valid pair
+        keep = top_scores > 0
+        for i in np.flatnonzero(keep.any(axis=1)):
+            row_keep = keep[i]
+            similarities[idx_to_query[start + i]] = [
+                (idx_to_query[gi], float(score), int(shared))
+                for gi, score, shared in zip(top_idx[i][row_keep],
+                                             top_scores[i][row_keep],
+                                             top_shared[i][row_keep])
+            ]
 
         if end % 2000 == 0 or end == n_queries:
             print(f"  Similarity progress: {end}/{n_queries} queries ({time.time() - t0:.1f}s)")
@@ -1923,29 +2016,22 @@ query_display: "{display_escaped}"
 
     print(f"  Generated {count} query pages in docs/queries/")
 
-    write_query_search_index(conn, slug_map, blacklist)
+    all_queries = get_top_queries(conn)
+    if blacklist:
+        all_queries = [r for r in all_queries if not is_blacklisted(r[0], blacklist)]
+    write_query_search_index(all_queries, slug_map)
     return slug_map
 
 
-def write_query_search_index(conn, slug_map: Dict[str, str], blacklist: List[str] = None) -> None:
+def write_query_search_index(all_queries: List[tuple], slug_map: Dict[str, str]) -> None:
     """Write docs/queries/index.json for the nav search-as-you-type box.
 
-    Lists all all-time queries with their unique_users / total_searches. Entries
-    that have a slug get an 's' field so the nav can deep-link to /query.html?q=<slug>.
+    Lists all all-time queries (already blacklist-filtered, as returned by
+    get_top_queries) with their unique_users / total_searches. Entries that
+    have a slug get an 's' field so the nav can deep-link to /query.html?q=<slug>.
     """
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT query_normalized, unique_users, total_searches
-        FROM period_top_queries
-        WHERE period_type = 'all_time' AND period_id = 'all_time'
-    """)
-    all_queries = cursor.fetchall()
-    cursor.close()
-
     search_index = []
     for query_norm, unique_users, total_searches in all_queries:
-        if blacklist and is_blacklisted(query_norm, blacklist):
-            continue
         entry = {
             'q': query_norm,
             'u': unique_users,
@@ -1971,8 +2057,11 @@ def main():
         print(f"ERROR: Failed to connect to database: {e}")
         raise
 
+    # One timestamp for the run: every page's "Last updated" line shows it
+    generated_at = datetime.now(timezone.utc)
+
     # Calculate cutoff: end of yesterday UTC (exclude incomplete current day)
-    cutoff_date = (datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoff_date = (generated_at.replace(hour=0, minute=0, second=0, microsecond=0)
                    - timedelta(seconds=1))
     print(f"Data cutoff: {cutoff_date.strftime('%Y-%m-%d %H:%M:%S')} UTC")
 
@@ -2025,15 +2114,23 @@ def main():
             print(f"  Removed blacklisted query pairs")
         cursor.close()
 
-        # Get eligible queries for similarity computation (queries with detail pages)
+        # Read query_daily_stats once: its queries are the similarity candidates
+        # (queries with detail pages) and its rows feed the detail SQLite.
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT query_normalized, date, search_count, unique_users
+            FROM query_daily_stats
+            ORDER BY query_normalized, date
+        """)
+        all_query_daily: Dict[str, list] = defaultdict(list)
+        for q, d, sc, uu in cursor.fetchall():
+            all_query_daily[q].append((d, sc, uu))
+        cursor.close()
+        eligible_queries = {q for q in all_query_daily if not is_blacklisted(q, blacklist)}
+
         print("=" * 60)
         print("COMPUTING QUERY SIMILARITIES")
         print("=" * 60)
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT query_normalized FROM query_daily_stats")
-        eligible_queries = {row[0] for row in cursor.fetchall()
-                           if not is_blacklisted(row[0], blacklist)}
-        cursor.close()
         print(f"  {len(eligible_queries)} eligible queries")
         query_similarities = compute_query_similarities(conn, eligible_queries)
 
@@ -2043,50 +2140,31 @@ def main():
         print("=" * 60)
         print("BUILDING QUERY DETAIL SQLITE")
         print("=" * 60)
-        cursor = conn.cursor()
-        if cutoff_date:
-            cursor.execute("""
-                SELECT query_normalized, date, search_count, unique_users
-                FROM query_daily_stats
-                WHERE date <= %s
-                ORDER BY query_normalized, date
-            """, (cutoff_date.date(),))
-        else:
-            cursor.execute("""
-                SELECT query_normalized, date, search_count, unique_users
-                FROM query_daily_stats
-                ORDER BY query_normalized, date
-            """)
-        query_daily: Dict[str, list] = defaultdict(list)
-        for q, d, sc, uu in cursor.fetchall():
-            query_daily[q].append((d, sc, uu))
-        cursor.close()
+        cutoff_day = cutoff_date.date()
+        query_daily: Dict[str, list] = {}
+        for q, days in all_query_daily.items():
+            if q not in eligible_queries:
+                continue
+            days = [row for row in days if row[0] <= cutoff_day]
+            if days:
+                query_daily[q] = days
         if blacklist:
-            before = len(query_daily)
-            query_daily = {q: v for q, v in query_daily.items()
-                           if not is_blacklisted(q, blacklist)}
-            print(f"  Blacklist removed {before - len(query_daily)} queries from detail data")
+            print(f"  Blacklist removed {len(all_query_daily) - len(eligible_queries)} queries from detail data")
+        del all_query_daily
         print(f"  Found daily data for {len(query_daily)} queries")
 
         # Slug map (needed for in-table hyperlinking on the all-time/period pages
         # and for the slug column in the SQLite).
         query_slug_map = {q: slugify_query(q) for q in query_daily}
 
-        # Top queries with 35+ users define which rows go into the SQLite for /query.html.
-        # We pull from period_top_queries (same source generate_query_pages used).
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT query_normalized, unique_users, total_searches
-            FROM period_top_queries
-            WHERE period_type = 'all_time' AND period_id = 'all_time'
-              AND unique_users >= 35
-            ORDER BY unique_users DESC, total_searches DESC
-        """)
-        detail_top_queries = cursor.fetchall()
-        cursor.close()
+        # All-time top queries are read once and shared by the SQLite, the nav
+        # search index and the all-time page. Those with 35+ users define which
+        # rows go into the SQLite for /query.html.
+        all_time_top_queries = get_top_queries(conn)
         if blacklist:
-            detail_top_queries = [r for r in detail_top_queries
-                                  if not is_blacklisted(r[0], blacklist)]
+            all_time_top_queries = [r for r in all_time_top_queries
+                                    if not is_blacklisted(r[0], blacklist)]
+        detail_top_queries = [r for r in all_time_top_queries if r[1] >= 35]
         print(f"  {len(detail_top_queries)} queries in SQLite (35+ users)")
 
         write_queries_db_file(
@@ -2099,27 +2177,35 @@ def main():
         )
 
         # Nav search-as-you-type index (small JSON, deep-links into /query.html)
-        write_query_search_index(conn, query_slug_map, blacklist)
+        write_query_search_index(all_time_top_queries, query_slug_map)
 
         # Generate all-time page (uses cumulative stats + materialized views)
         print("=" * 60)
         print("GENERATING ALL-TIME PAGE")
         print("=" * 60)
-        generate_all_time_page(conn, cutoff_date, query_slug_map, blacklist)
-
-        # Generate monthly pages
-        for month in periods['months']:
-            print("=" * 60)
-            print(f"GENERATING MONTHLY PAGE: {month['label']}")
-            print("=" * 60)
-            generate_period_page(conn, 'month', month, cutoff_date, query_slug_map, blacklist)
-
-        # Generate weekly pages
-        for week in periods['weeks']:
+        generate_all_time_page(conn, cutoff_date, query_slug_map, blacklist,
+                               top_queries=all_time_top_queries, generated_at=generated_at)
+
+        # Generate monthly and weekly pages (independent of each other, so
+        # run in parallel). Months go first: they are the largest pages.
+        period_jobs = ([('month', month) for month in periods['months']]
+                       + [('week', week) for week in periods['weeks']])
+        if period_jobs:
+            period_daily_rows = split_daily_rows_by_period(conn, period_jobs, cutoff_date)
+            period_jobs = [(period_type, period_info, daily_rows)
+                           for (period_type, period_info), daily_rows
+                           in zip(period_jobs, period_daily_rows)]
+            max_workers = min(int(os.environ.get('PAGE_WORKERS', os.cpu_count() or 1)),
+                              len(period_jobs))
             print("=" * 60)
-            print(f"GENERATING WEEKLY PAGE: CW {week['label']}")
+            print(f"GENERATING {len(periods['months'])} MONTHLY AND {len(periods['weeks'])} "
+                  f"WEEKLY PAGES ({max_workers} workers)")
             print("=" * 60)
-            generate_period_page(conn, 'week', week, cutoff_date, query_slug_map, blacklist)
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     initializer=_init_page_worker,
+                                     initargs=(cutoff_date, query_slug_map, blacklist,
+                                               generated_at)) as ex:
+                list(ex.map(_generate_period_page_job, period_jobs))
 
         total_pages = 1 + len(periods['months']) + len(periods['weeks']) + len(query_slug_map)
         print("\n" + "=" * 60)
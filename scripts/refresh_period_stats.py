@@ -11,6 +11,7 @@ Two modes:
 """
 
 import glob
+import io
 import os
 import sys
 from datetime import date, datetime, timedelta, timezone
@@ -26,23 +27,13 @@ def get_db_connection():
     if not database_url:
         raise ValueError("DATABASE_URL environment variable not set")
 
-    # Parse postgresql:// URL to connection params
-    if database_url.startswith('postgresql://'):
-        database_url = database_url.replace('postgresql://', '')
-    elif database_url.startswith('postgresql+asyncpg://'):
-        database_url = database_url.replace('postgresql+asyncpg://', '')
-
-    parts = database_url.split('@')
-    user_pass = parts[0].split(':')
-    host_db = parts[1].split('/')
-    host_port = host_db[0].split(':')
+    # libpq parses the URL itself, including percent-escaped credentials;
+    # only the SQLAlchemy async driver alias needs rewriting
+    if database_url.startswith('postgresql+asyncpg://'):
+        database_url = database_url.replace('postgresql+asyncpg://', 'postgresql://', 1)
 
     return psycopg2.connect(
-        host=host_port[0],
-        port=int(host_port[1]) if len(host_port) > 1 else 5432,
-        user=user_pass[0],
-        password=user_pass[1] if len(user_pass) > 1 else '',
-        dbname=host_db[1],
+        database_url,
         connect_timeout=30,
         options='-c statement_timeout=3600000',  # 60 min timeout for period processing
         keepalives=1,
@@ -280,25 +271,46 @@ def sql_compute_all_summary_stats(
     return results
 
 
-def sql_compute_top_queries(
-    conn, period_type: str, period_id: str,
-    start_date: date, end_date: date
-) -> int:
-    """Compute top queries for a period using SQL."""
+def sql_create_period_query_totals(
+    conn, period_type: str, start_date: date, end_date: date
+):
+    """Aggregate a period's tuples per query into the period_query_totals temp table.
+
+    Top queries and the query length distribution are both per-query
+    aggregates of the same period, so the MV is scanned and grouped once
+    and both read the (much smaller) per-query table. The table is created
+    once per session and truncated for each period.
+    """
     where, params = _sql_date_filter(period_type, start_date, end_date)
 
     cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS period_query_totals (
+            query_normalized TEXT,
+            unique_users BIGINT,
+            total_searches NUMERIC
+        )
+    """)
+    cursor.execute("TRUNCATE period_query_totals")
     cursor.execute(f"""
+        INSERT INTO period_query_totals
         SELECT query_normalized,
                COUNT(DISTINCT username) AS unique_users,
                SUM(search_count) AS total_searches
         FROM mv_daily_search_tuples
         {where}
         GROUP BY query_normalized
-        HAVING COUNT(DISTINCT username) >= 5
-        ORDER BY unique_users DESC, total_searches DESC
     """, params)
-    rows = cursor.fetchall()
+    cursor.close()
+
+
+def sql_compute_top_queries(conn, period_type: str, period_id: str) -> int:
+    """Compute top queries for a period from period_query_totals.
+
+    Ranked with ROW_NUMBER() and inserted server-side, so the period's
+    rows never round-trip through Python.
+    """
+    cursor = conn.cursor()
 
     # Delete old data
     cursor.execute("""
@@ -306,52 +318,23 @@ def sql_compute_top_queries(
         WHERE period_type = %s AND period_id = %s
     """, (period_type, period_id))
 
-    if not rows:
-        conn.commit()
-        cursor.close()
-        return 0
-
-    values = [
-        (period_type, period_id, row[0], row[1], int(row[2]), rank)
-        for rank, row in enumerate(rows, 1)
-    ]
-
-    execute_values(
-        cursor,
-        """INSERT INTO period_top_queries
-           (period_type, period_id, query_normalized, unique_users, total_searches, rank)
-           VALUES %s""",
-        values,
-        page_size=5000,
-    )
+    cursor.execute("""
+        INSERT INTO period_top_queries
+            (period_type, period_id, query_normalized, unique_users, total_searches, rank)
+        SELECT %s, %s, query_normalized, unique_users, total_searches,
+               ROW_NUMBER() OVER (ORDER BY unique_users DESC, total_searches DESC)
+        FROM period_query_totals
+        WHERE unique_users >= 5
+    """, (period_type, period_id))
+    inserted = cursor.rowcount
 
-    conn.commit()
     cursor.close()
-    return len(values)
+    return inserted
 
 
-def sql_compute_query_length_dist(
-    conn, period_type: str, period_id: str,
-    start_date: date, end_date: date
-) -> int:
-    """Compute query length distribution for a period using SQL."""
-    where, params = _sql_date_filter(period_type, start_date, end_date)
-
+def sql_compute_query_length_dist(conn, period_type: str, period_id: str) -> int:
+    """Compute query length distribution for a period from period_query_totals."""
     cursor = conn.cursor()
-    cursor.execute(f"""
-        SELECT query_length, COUNT(DISTINCT query_normalized) AS unique_query_count
-        FROM (
-            SELECT query_normalized,
-                   array_length(string_to_array(query_normalized, ' '), 1) AS query_length
-            FROM mv_daily_search_tuples
-            {where}
-            GROUP BY query_normalized
-        ) sub
-        WHERE query_length <= 100
-        GROUP BY query_length
-        ORDER BY query_length
-    """, params)
-    rows = cursor.fetchall()
 
     # Delete old data
     cursor.execute("""
@@ -359,27 +342,22 @@ def sql_compute_query_length_dist(
         WHERE period_type = %s AND period_id = %s
     """, (period_type, period_id))
 
-    if not rows:
-        conn.commit()
-        cursor.close()
-        return 0
-
-    values = [
-        (period_type, period_id, row[0], row[1])
-        for row in rows
-    ]
-
-    execute_values(
-        cursor,
-        """INSERT INTO period_query_length_dist
-           (period_type, period_id, query_length, unique_query_count)
-           VALUES %s""",
-        values,
-    )
+    cursor.execute("""
+        INSERT INTO period_query_length_dist
+            (period_type, period_id, query_length, unique_query_count)
+        SELECT %s, %s, query_length, COUNT(*) AS unique_query_count
+        FROM (
+            -- One row per distinct query, so COUNT(*) needs no DISTINCT sort
+            SELECT array_length(string_to_array(query_normalized, ' '), 1) AS query_length
+            FROM period_query_totals
+        ) sub
+        WHERE query_length <= 100
+        GROUP BY query_length
+    """, (period_type, period_id))
+    inserted = cursor.rowcount
 
-    conn.commit()
     cursor.close()
-    return len(values)
+    return inserted
 
 
 def sql_compute_query_daily_stats(conn, min_live_date: Optional[date]):
@@ -429,7 +407,6 @@ def sql_compute_query_daily_stats(conn, min_live_date: Optional[date]):
             FROM mv_daily_search_tuples
             WHERE query_normalized = ANY(%s)
             GROUP BY query_normalized, date
-            ORDER BY query_normalized, date
         """, (chunk,))
 
         inserted = cursor.rowcount
@@ -447,35 +424,153 @@ def sql_compute_query_daily_stats(conn, min_live_date: Optional[date]):
 # Used after archival when some data only exists in Parquet files.
 # ---------------------------------------------------------------------------
 
-def _export_live_to_parquet(conn, live_parquet: str) -> int:
-    """Export live MV data to a Parquet file using server-side cursor."""
+# Spill to root disk (72GB free post-upgrade). /tmp inside the --rm
+# container writes to docker overlay storage on the host root disk.
+DUCKDB_SPILL_DIR = "/tmp/_duckdb_spill"
+
+
+def _duckdb_connect():
+    """Open an in-memory DuckDB connection configured for out-of-core aggregation."""
+    import duckdb
+
+    con = duckdb.connect()
+    os.makedirs(DUCKDB_SPILL_DIR, exist_ok=True)
+    con.execute(f"SET temp_directory='{DUCKDB_SPILL_DIR}'")
+    con.execute("SET memory_limit='10GB'")
+    con.execute("SET threads=4")
+    con.execute("SET preserve_insertion_order=false")
+    # Cache Parquet footers so repeated scans of the same files in one
+    # connection don't re-read and re-parse their metadata
+    con.execute("SET enable_object_cache=true")
+    return con
+
+
+def _cleanup_duckdb_spill():
+    """Best-effort cleanup of the DuckDB spill dir."""
+    try:
+        for f in glob.glob(os.path.join(DUCKDB_SPILL_DIR, "*")):
+            os.remove(f)
+    except OSError:
+        pass
+
+
+LIVE_TUPLES_QUERY = "SELECT date, username, query_normalized, search_count FROM mv_daily_search_tuples"
+
+
+def _load_postgres_extension(con) -> None:
+    """Load DuckDB's postgres extension, downloading it only if not installed yet."""
+    import duckdb
+
+    try:
+        con.execute("LOAD postgres")
+    except duckdb.Error:
+        con.execute("INSTALL postgres")
+        con.execute("LOAD postgres")
+
+
+def _export_live_to_parquet_duckdb(live_parquet: str) -> Optional[int]:
+    """Export live MV data to Parquet through DuckDB's postgres extension.
+
+    DuckDB pulls the rows over the binary protocol and writes them straight
+    to Parquet, so no row ever becomes a Python object. Returns None if the
+    extension cannot be loaded or the database cannot be attached; errors
+    during the export itself are raised.
+    """
+    import duckdb
+
+    database_url = os.environ['DATABASE_URL'].replace('postgresql+asyncpg://', 'postgresql://')
+
+    con = _duckdb_connect()
+    try:
+        try:
+            _load_postgres_extension(con)
+            escaped_url = database_url.replace("'", "''")
+            con.execute(f"ATTACH '{escaped_url}' AS pg (TYPE postgres, READ_ONLY)")
+        except duckdb.Error as e:
+            # Only the error type: ATTACH errors echo the DSN, password included
+            print(f"  DuckDB postgres export unavailable ({type(e).__name__}), using COPY export")
+            return None
+        row_count = con.execute(f"""
+            COPY (SELECT * FROM postgres_query('pg', '{LIVE_TUPLES_QUERY}'))
+            TO '{live_parquet}' (FORMAT parquet, COMPRESSION snappy)
+        """).fetchone()[0]
+    finally:
+        con.close()
+    return int(row_count)
+
+
+def _export_live_to_parquet_copy(conn, live_parquet: str) -> int:
+    """Export live MV data to Parquet by streaming COPY ... TO STDOUT.
+
+    Postgres formats the rows itself (no per-row fetch through the
+    psycopg2 cursor); a background thread pumps the COPY output into a
+    pipe that pyarrow's streaming CSV reader turns into record batches.
+    """
+    import threading
+
     import pyarrow as pa
+    import pyarrow.csv as pacsv
     import pyarrow.parquet as pq
 
-    cursor = conn.cursor(name="export_live_cursor")
-    cursor.itersize = 500_000
-    cursor.execute("SELECT date, username, query_normalized, search_count FROM mv_daily_search_tuples")
+    schema = pa.schema([
+        ("date", pa.date32()),
+        ("username", pa.string()),
+        ("query_normalized", pa.string()),
+        ("search_count", pa.int64()),
+    ])
+
+    read_fd, write_fd = os.pipe()
+    copy_errors = []
+
+    def _copy_out():
+        try:
+            with os.fdopen(write_fd, 'wb') as pipe_out:
+                cursor = conn.cursor()
+                cursor.copy_expert(
+                    f"COPY ({LIVE_TUPLES_QUERY}) TO STDOUT WITH (FORMAT csv)", pipe_out
+                )
+                cursor.close()
+        except Exception as e:
+            copy_errors.append(e)
+
+    copy_thread = threading.Thread(target=_copy_out, daemon=True)
+    copy_thread.start()
 
-    writer = None
     row_count = 0
-    while True:
-        rows = cursor.fetchmany(cursor.itersize)
-        if not rows:
-            break
-        table = pa.table({
-            "date": [r[0] for r in rows],
-            "username": [r[1] for r in rows],
-            "query_normalized": [r[2] for r in rows],
-            "search_count": [int(r[3]) for r in rows],
-        })
-        if writer is None:
-            writer = pq.ParquetWriter(live_parquet, table.schema, compression="snappy")
-        writer.write_table(table)
-        row_count += len(rows)
-        del rows, table
-    cursor.close()
-    if writer is not None:
-        writer.close()
+    with os.fdopen(read_fd, 'rb') as pipe_in, \
+            pq.ParquetWriter(live_parquet, schema, compression="snappy") as writer:
+        if pipe_in.peek(1):
+            reader = pacsv.open_csv(
+                pipe_in,
+                read_options=pacsv.ReadOptions(
+                    column_names=schema.names, block_size=64 << 20
+                ),
+                parse_options=pacsv.ParseOptions(newlines_in_values=True),
+                convert_options=pacsv.ConvertOptions(
+                    column_types=schema,
+                    strings_can_be_null=False,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+            for batch in reader:
+                writer.write_batch(batch)
+                row_count += batch.num_rows
+    copy_thread.join()
+    if copy_errors:
+        raise copy_errors[0]
+    return row_count
+
+
+def _export_live_to_parquet(conn, live_parquet: str) -> int:
+    """Export live MV data to a Parquet file.
+
+    Uses DuckDB's postgres extension when it can be loaded, falling back to
+    a psycopg2 COPY stream (e.g. when the extension cannot be downloaded on
+    an offline host).
+    """
+    row_count = _export_live_to_parquet_duckdb(live_parquet)
+    if row_count is None:
+        row_count = _export_live_to_parquet_copy(conn, live_parquet)
     print(f"  Exported {row_count:,} live rows to temp Parquet")
     return row_count
 
@@ -540,135 +635,83 @@ def _sql_compute_period_summary(conn, start_date, end_date):
     return (int(row[2]), int(row[3]), int(row[0]), int(row[1]), row[4], row[5])
 
 
-def _polars_compute_summary_split(conn, archive_path: str):
-    """Compute all_time summary stats with minimal peak memory.
+def _copy_frame(cursor, df, table: str, columns: List[str]) -> int:
+    """Bulk-load a polars DataFrame's columns into a table via COPY ... FROM STDIN.
+
+    polars renders the CSV natively and Postgres parses it in a single
+    statement, where execute_values needs a Python tuple per row and
+    mogrifies every value into INSERT text.
+    """
+    buf = io.BytesIO()
+    df.select(columns).write_csv(buf, include_header=False)
+    buf.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf
+    )
+    return df.height
+
+
+def _all_tuple_parquet_files(archive_path: str, as_glob: bool = False) -> List[str]:
+    """Archived daily tuple Parquet files plus the live MV export, if present.
+
+    With as_glob=True the archived files are returned as a single glob
+    pattern for DuckDB's read_parquet(), which expands it itself, instead
+    of being listed and quoted into the query one by one.
+    """
+    archive_glob = os.path.join(archive_path, "daily_tuples_*.parquet")
+    parquet_files = sorted(glob.glob(archive_glob))
+    if as_glob and parquet_files:
+        parquet_files = [archive_glob]
+    live_pq = os.path.join(archive_path, "_live_tuples.parquet")
+    if os.path.exists(live_pq):
+        parquet_files.append(live_pq)
+    return parquet_files
+
+
+def _compute_summary_streamed(archive_path: str):
+    """Compute all_time summary stats via DuckDB out-of-core aggregation.
 
     The full dataset (archived + live, ~56M+ rows) cannot fit in memory on 8GB.
-    Each metric is computed in a separate pass, reading only the columns needed,
-    so memory from the previous pass is freed before the next one starts.
-    Unique pairs use integer hashes instead of string tuples (~700MB vs ~3.6GB).
+    DuckDB scans only the needed Parquet columns and its DISTINCT/GROUP BY
+    hash tables spill to disk, so no Python-side sets of users, queries or
+    pairs are built. Live rows come from the temp Parquet export of the MV.
     """
-    import pyarrow.parquet as pq
+    sources = _all_tuple_parquet_files(archive_path, as_glob=True)
+    if not sources:
+        return None
 
-    parquet_files = sorted(glob.glob(os.path.join(archive_path, "daily_tuples_*.parquet")))
-    cursor = conn.cursor()
+    print(f"    Aggregating {', '.join(sources)} via DuckDB...")
+    con = _duckdb_connect()
+    con.read_parquet(sources).create_view("tuples")
 
-    # Pass 1: total_searches, first_date, last_date (minimal memory)
-    print("    Pass 1: total_searches, date range...")
-    total_searches = 0
-    first_date = None
-    last_date = None
-    for pf in parquet_files:
-        pf_reader = pq.ParquetFile(pf)
-        for batch in pf_reader.iter_batches(batch_size=500_000, columns=["date", "search_count"]):
-            import pyarrow.compute as pc
-            total_searches += pc.sum(batch.column("search_count")).as_py()
-            d_min = pc.min(batch.column("date")).as_py()
-            d_max = pc.max(batch.column("date")).as_py()
-            if first_date is None or d_min < first_date:
-                first_date = d_min
-            if last_date is None or d_max > last_date:
-                last_date = d_max
-            del batch
-        del pf_reader
-    cursor.execute("SELECT SUM(search_count), MIN(date), MAX(date) FROM mv_daily_search_tuples")
-    mv_sum, mv_min, mv_max = cursor.fetchone()
-    if mv_sum:
-        total_searches += mv_sum
-        if first_date is None or mv_min < first_date:
-            first_date = mv_min
-        if last_date is None or mv_max > last_date:
-            last_date = mv_max
-
-    if total_searches == 0:
-        cursor.close()
+    total_searches, first_date, last_date = con.execute(
+        "SELECT SUM(search_count)::BIGINT, MIN(date), MAX(date) FROM tuples"
+    ).fetchone()
+    if not total_searches:
+        con.close()
         return None
     print(f"      {total_searches:,} searches, {first_date} to {last_date}")
 
-    # Pass 2: unique users
-    print("    Pass 2: unique users...")
-    unique_users = set()
-    for pf in parquet_files:
-        pf_reader = pq.ParquetFile(pf)
-        for batch in pf_reader.iter_batches(batch_size=500_000, columns=["username"]):
-            unique_users.update(batch.column("username").to_pylist())
-            del batch
-        del pf_reader
-    cursor.execute("SELECT DISTINCT username FROM mv_daily_search_tuples")
-    for row in cursor:
-        unique_users.add(row[0])
-    n_users = len(unique_users)
-    del unique_users
+    n_users = con.execute(
+        "SELECT COUNT(*) FROM (SELECT DISTINCT username FROM tuples)"
+    ).fetchone()[0]
     print(f"      {n_users:,} unique users")
-
-    # Pass 3: unique queries (hash-based to save memory on ~20M strings)
-    print("    Pass 3: unique queries...")
-    query_hashes = set()
-    for pf in parquet_files:
-        pf_reader = pq.ParquetFile(pf)
-        for batch in pf_reader.iter_batches(
-            batch_size=500_000, columns=["query_normalized"]
-        ):
-            for q in batch.column("query_normalized").to_pylist():
-                query_hashes.add(hash(q))
-            del batch
-        del pf_reader
-    mv_cursor = conn.cursor(name="alltime_queries_cursor")
-    mv_cursor.itersize = 500_000
-    mv_cursor.execute("SELECT DISTINCT query_normalized FROM mv_daily_search_tuples")
-    while True:
-        rows = mv_cursor.fetchmany(mv_cursor.itersize)
-        if not rows:
-            break
-        for row in rows:
-            query_hashes.add(hash(row[0]))
-        del rows
-    mv_cursor.close()
-    n_queries = len(query_hashes)
-    del query_hashes
+    n_queries = con.execute(
+        "SELECT COUNT(*) FROM (SELECT DISTINCT query_normalized FROM tuples)"
+    ).fetchone()[0]
     print(f"      {n_queries:,} unique queries")
-
-    # Pass 4: unique pairs (hash-based, streamed in batches)
-    print("    Pass 4: unique pairs (hash-based)...")
-    pair_hashes = set()
-    for pf in parquet_files:
-        print(f"      Scanning {os.path.basename(pf)}...")
-        pf_reader = pq.ParquetFile(pf)
-        for batch in pf_reader.iter_batches(
-            batch_size=500_000, columns=["username", "query_normalized"]
-        ):
-            users_col = batch.column("username").to_pylist()
-            queries_col = batch.column("query_normalized").to_pylist()
-            for u, q in zip(users_col, queries_col):
-                pair_hashes.add(hash((u, q)))
-            del users_col, queries_col, batch
-        del pf_reader
-        print(f"        {len(pair_hashes):,} unique pair hashes so far")
-    # Live MV pairs via server-side cursor
-    mv_cursor = conn.cursor(name="alltime_pairs_cursor")
-    mv_cursor.itersize = 500_000
-    mv_cursor.execute(
-        "SELECT DISTINCT username, query_normalized FROM mv_daily_search_tuples"
-    )
-    while True:
-        rows = mv_cursor.fetchmany(mv_cursor.itersize)
-        if not rows:
-            break
-        for u, q in rows:
-            pair_hashes.add(hash((u, q)))
-        del rows
-    mv_cursor.close()
-    n_pairs = len(pair_hashes)
-    del pair_hashes
+    n_pairs = con.execute(
+        "SELECT COUNT(*) FROM (SELECT DISTINCT username, query_normalized FROM tuples)"
+    ).fetchone()[0]
     print(f"      {n_pairs:,} unique pairs")
-
-    cursor.close()
+    con.close()
+    _cleanup_duckdb_spill()
 
     print(f"    Final: {n_users:,} users, {n_queries:,} queries, "
           f"{n_pairs:,} pairs, {total_searches:,} searches")
 
-    return (n_queries, n_pairs, int(total_searches),
-            n_users, first_date, last_date)
+    return (int(n_queries), int(n_pairs), int(total_searches),
+            int(n_users), first_date, last_date)
 
 
 def polars_compute_all_summary_stats(
@@ -685,9 +728,9 @@ def polars_compute_all_summary_stats(
         start = datetime.now(timezone.utc)
 
         if period_type == 'all_time':
-            # Process files individually to avoid OOM on 8GB server
+            # Out-of-core aggregation to avoid OOM on 8GB server
             archive_path = os.environ.get('ARCHIVE_PATH', '/archives')
-            row = _polars_compute_summary_split(conn, archive_path)
+            row = _compute_summary_streamed(archive_path)
             if row is None:
                 elapsed = (datetime.now(timezone.utc) - start).total_seconds()
                 print(f"    No data for this period ({elapsed:.1f}s)")
@@ -771,29 +814,18 @@ def polars_compute_all_summary_stats(
     return results
 
 
-def _compute_top_queries_streamed(conn, archive_path: str) -> list:
+def _compute_top_queries_streamed(conn, archive_path: str):
     """Compute all_time top queries via DuckDB out-of-core aggregation.
 
     DuckDB's hash aggregation spills to disk when memory pressure is high,
     handling the ~39M unique queries × ~328M rows that overflow polars.
+    The result comes back as a polars DataFrame over DuckDB's Arrow output,
+    so no intermediate Python row tuples are built.
     """
-    import duckdb
+    sources = _all_tuple_parquet_files(archive_path, as_glob=True)
 
-    parquet_files = sorted(glob.glob(os.path.join(archive_path, "daily_tuples_*.parquet")))
-    live_pq = os.path.join(archive_path, "_live_tuples.parquet")
-    if os.path.exists(live_pq):
-        parquet_files.append(live_pq)
-
-    print(f"      Aggregating {len(parquet_files)} Parquet files via DuckDB...")
-    con = duckdb.connect()
-    # Spill to root disk (72GB free post-upgrade). /tmp inside the --rm
-    # container writes to docker overlay storage on the host root disk.
-    spill_dir = "/tmp/_duckdb_spill"
-    os.makedirs(spill_dir, exist_ok=True)
-    con.execute(f"SET temp_directory='{spill_dir}'")
-    con.execute("SET memory_limit='10GB'")
-    con.execute("SET threads=4")
-    con.execute("SET preserve_insertion_order=false")
+    print(f"      Aggregating {', '.join(sources)} via DuckDB...")
+    con = _duckdb_connect()
 
     # Two-pass aggregation: inner deduplicates (query, user) pairs into a
     # streamable intermediate; outer counts rows per query. DuckDB spills
@@ -815,19 +847,48 @@ def _compute_top_queries_streamed(conn, archive_path: str) -> list:
         HAVING COUNT(*) >= 5
         ORDER BY unique_users DESC, total_searches DESC
         """,
-        [parquet_files],
-    ).fetchall()
+        [sources],
+    ).pl()
     con.close()
+    _cleanup_duckdb_spill()
 
-    # Best-effort cleanup of spill dir
-    try:
-        for f in glob.glob(os.path.join(spill_dir, "*")):
-            os.remove(f)
-    except OSError:
-        pass
+    print(f"      {rows.height:,} queries with 5+ users")
+    return rows
 
-    print(f"      {len(rows):,} queries with 5+ users")
-    return [(q, int(u), int(t)) for q, u, t in rows]
+
+def _compute_length_dist_streamed(archive_path: str) -> List[tuple]:
+    """Compute the all_time query length distribution via DuckDB.
+
+    Each distinct query is counted once, in the bucket of its word count.
+    DuckDB deduplicates across all files with a hash aggregate that spills
+    to disk, so no Python set of the ~39M distinct queries is built.
+    """
+    sources = _all_tuple_parquet_files(archive_path, as_glob=True)
+    if not sources:
+        return []
+
+    con = _duckdb_connect()
+    rows = con.execute(
+        """
+        WITH queries AS (
+            SELECT DISTINCT query_normalized
+            FROM read_parquet(?)
+        ), lengths AS (
+            SELECT length(query_normalized)
+                   - length(replace(query_normalized, ' ', '')) + 1 AS query_length
+            FROM queries
+        )
+        SELECT query_length::INTEGER, COUNT(*)::BIGINT
+        FROM lengths
+        WHERE query_length <= 100
+        GROUP BY query_length
+        ORDER BY query_length
+        """,
+        [sources],
+    ).fetchall()
+    con.close()
+    _cleanup_duckdb_spill()
+    return rows
 
 
 def polars_compute_top_queries(
@@ -840,53 +901,24 @@ def polars_compute_top_queries(
     if period_type == 'all_time':
         # Stream through files to avoid OOM
         archive_path = os.environ.get('ARCHIVE_PATH', '/archives')
-        results = _compute_top_queries_streamed(conn, archive_path)
-
-        cursor = conn.cursor()
-        cursor.execute("""
-            DELETE FROM period_top_queries
-            WHERE period_type = %s AND period_id = %s
-        """, (period_type, period_id))
-
-        if not results:
-            conn.commit()
-            cursor.close()
-            return 0
-
-        values = [
-            (period_type, period_id, q, unique_users, total_searches, rank)
-            for rank, (q, unique_users, total_searches) in enumerate(results, 1)
-        ]
-        del results
-
-        execute_values(
-            cursor,
-            """INSERT INTO period_top_queries
-               (period_type, period_id, query_normalized, unique_users, total_searches, rank)
-               VALUES %s""",
-            values,
-            page_size=5000,
+        result_df = (
+            _compute_top_queries_streamed(conn, archive_path)
+            .with_row_index("rank", offset=1)
         )
-        conn.commit()
-        cursor.close()
-        return len(values)
-
-    filtered = tuples_lf.filter(
-        (pl.col("date") >= start_date) & (pl.col("date") <= end_date)
-    )
-
-    result_df = (
-        filtered
-        .group_by("query_normalized")
-        .agg(
-            pl.col("username").n_unique().alias("unique_users"),
-            pl.col("search_count").sum().alias("total_searches"),
+    else:
+        result_df = (
+            tuples_lf
+            .filter((pl.col("date") >= start_date) & (pl.col("date") <= end_date))
+            .group_by("query_normalized")
+            .agg(
+                pl.col("username").n_unique().alias("unique_users"),
+                pl.col("search_count").sum().alias("total_searches"),
+            )
+            .filter(pl.col("unique_users") >= 5)
+            .sort(["unique_users", "total_searches"], descending=True)
+            .with_row_index("rank", offset=1)
+            .collect()
         )
-        .filter(pl.col("unique_users") >= 5)
-        .sort(["unique_users", "total_searches"], descending=True)
-        .with_row_index("rank", offset=1)
-        .collect()
-    )
 
     cursor = conn.cursor()
     cursor.execute("""
@@ -895,27 +927,20 @@ def polars_compute_top_queries(
     """, (period_type, period_id))
 
     if result_df.height == 0:
-        conn.commit()
         cursor.close()
         return 0
 
-    values = [
-        (period_type, period_id, row[1], int(row[2]), int(row[3]), int(row[0]))
-        for row in result_df.iter_rows()
-    ]
-
-    execute_values(
+    inserted = _copy_frame(
         cursor,
-        """INSERT INTO period_top_queries
-           (period_type, period_id, query_normalized, unique_users, total_searches, rank)
-           VALUES %s""",
-        values,
-        page_size=5000,
+        result_df.with_columns(
+            pl.lit(period_type).alias("period_type"), pl.lit(period_id).alias("period_id"),
+        ),
+        "period_top_queries",
+        ["period_type", "period_id", "query_normalized", "unique_users", "total_searches", "rank"],
     )
 
-    conn.commit()
     cursor.close()
-    return len(values)
+    return inserted
 
 
 def polars_compute_query_length_dist(
@@ -926,51 +951,29 @@ def polars_compute_query_length_dist(
     import polars as pl
 
     if period_type == 'all_time':
-        # Stream through files: collect unique query hashes per word count
-        import pyarrow.parquet as pq
-        from collections import defaultdict
-
         archive_path = os.environ.get('ARCHIVE_PATH', '/archives')
-        parquet_files = sorted(glob.glob(os.path.join(archive_path, "daily_tuples_*.parquet")))
-        live_pq = os.path.join(archive_path, "_live_tuples.parquet")
-        if os.path.exists(live_pq):
-            parquet_files.append(live_pq)
-
-        # length -> set of query hashes
-        length_queries = defaultdict(set)
-        for pf in parquet_files:
-            pf_reader = pq.ParquetFile(pf)
-            for batch in pf_reader.iter_batches(
-                batch_size=500_000, columns=["query_normalized"]
-            ):
-                for q in batch.column("query_normalized").to_pylist():
-                    qlen = q.count(" ") + 1
-                    if qlen <= 100:
-                        length_queries[qlen].add(hash(q))
-                del batch
-            del pf_reader
-
-        result_rows = sorted(
-            [(length, len(hashes)) for length, hashes in length_queries.items()]
-        )
-        del length_queries
+        result_rows = _compute_length_dist_streamed(archive_path)
     else:
         filtered = tuples_lf.filter(
             (pl.col("date") >= start_date) & (pl.col("date") <= end_date)
         )
 
+        # Deduplicate queries first so each word count is computed once per
+        # distinct query rather than once per (date, user, query) tuple
         result_df = (
             filtered
+            .select("query_normalized")
+            .unique()
             .with_columns(
-                (pl.col("query_normalized").str.count_matches(" ") + 1).alias("query_length")
+                (pl.col("query_normalized").str.count_matches(" ", literal=True) + 1)
+                .alias("query_length")
             )
             .filter(pl.col("query_length") <= 100)
             .group_by("query_length")
-            .agg(pl.col("query_normalized").n_unique().alias("unique_query_count"))
-            .sort("query_length")
+            .agg(pl.len().alias("unique_query_count"))
             .collect()
         )
-        result_rows = [(int(row[0]), int(row[1])) for row in result_df.iter_rows()]
+        result_rows = result_df.rows()
 
     cursor = conn.cursor()
     cursor.execute("""
@@ -979,7 +982,6 @@ def polars_compute_query_length_dist(
     """, (period_type, period_id))
 
     if not result_rows:
-        conn.commit()
         cursor.close()
         return 0
 
@@ -996,7 +998,6 @@ def polars_compute_query_length_dist(
         values,
     )
 
-    conn.commit()
     cursor.close()
     return len(values)
 
@@ -1054,7 +1055,6 @@ def polars_compute_query_daily_stats(conn, live_parquet: str, min_live_date: Opt
                     pl.col("search_count").sum().alias("search_count"),
                     pl.col("username").n_unique().alias("unique_users"),
                 )
-                .sort(["query_normalized", "date"])
                 .collect(engine="streaming")
             )
             print(f"  Backfill: {backfill_df.height:,} rows from archives")
@@ -1069,7 +1069,6 @@ def polars_compute_query_daily_stats(conn, live_parquet: str, min_live_date: Opt
             pl.col("search_count").sum().alias("search_count"),
             pl.col("username").n_unique().alias("unique_users"),
         )
-        .sort(["query_normalized", "date"])
         .collect(engine="streaming")
     )
     print(f"  Live: {daily_df.height:,} daily rows")
@@ -1113,42 +1112,20 @@ def polars_compute_query_daily_stats(conn, live_parquet: str, min_live_date: Opt
             conn.commit()
             cursor.close()
 
-    # Stream insert in chunks directly from polars (no intermediate list)
+    # COPY in chunks so only one slice's CSV is buffered at a time
     print("  Inserting daily stats rows...")
     total_inserted = 0
-    insert_chunk_size = 10000
-    chunk_vals = []
-    for row in daily_df.iter_rows():
-        chunk_vals.append((row[0], row[1], int(row[2]), int(row[3])))
-        if len(chunk_vals) >= insert_chunk_size:
-            cursor = conn.cursor()
-            execute_values(
-                cursor,
-                """INSERT INTO query_daily_stats
-                   (query_normalized, date, search_count, unique_users)
-                   VALUES %s""",
-                chunk_vals,
-                page_size=5000,
-            )
-            conn.commit()
-            cursor.close()
-            total_inserted += len(chunk_vals)
-            chunk_vals = []
-
-    # Flush remainder
-    if chunk_vals:
+    insert_chunk_size = 200000
+    for offset in range(0, daily_df.height, insert_chunk_size):
         cursor = conn.cursor()
-        execute_values(
+        total_inserted += _copy_frame(
             cursor,
-            """INSERT INTO query_daily_stats
-               (query_normalized, date, search_count, unique_users)
-               VALUES %s""",
-            chunk_vals,
-            page_size=5000,
+            daily_df.slice(offset, insert_chunk_size),
+            "query_daily_stats",
+            ["query_normalized", "date", "search_count", "unique_users"],
         )
         conn.commit()
         cursor.close()
-        total_inserted += len(chunk_vals)
 
     del daily_df
     print(f"  Inserted {total_inserted:,} daily rows total")
@@ -1229,7 +1206,9 @@ def refresh_period_stats(conn):
     elapsed = (datetime.now(timezone.utc) - t0).total_seconds()
     print(f"  Done: {len(summary_lookup)} period summaries in {elapsed:.1f}s")
 
-    # Compute top queries and query length dist per period
+    # Compute top queries and query length dist per period. The compute
+    # functions don't commit: each period's two tables are committed
+    # together, so locks on the period tables are held for one period only.
     total_queries = 0
     total_dists = 0
 
@@ -1245,7 +1224,8 @@ def refresh_period_stats(conn):
         if use_polars:
             qi = polars_compute_top_queries(conn, tuples_lf, period_type, period_id, start_date, end_date)
         else:
-            qi = sql_compute_top_queries(conn, period_type, period_id, start_date, end_date)
+            sql_create_period_query_totals(conn, period_type, start_date, end_date)
+            qi = sql_compute_top_queries(conn, period_type, period_id)
         elapsed = (datetime.now(timezone.utc) - t0).total_seconds()
         print(f"  Top queries: {qi} inserted in {elapsed:.1f}s")
         total_queries += qi
@@ -1254,11 +1234,19 @@ def refresh_period_stats(conn):
         if use_polars:
             di = polars_compute_query_length_dist(conn, tuples_lf, period_type, period_id, start_date, end_date)
         else:
-            di = sql_compute_query_length_dist(conn, period_type, period_id, start_date, end_date)
+            di = sql_compute_query_length_dist(conn, period_type, period_id)
         elapsed = (datetime.now(timezone.utc) - t0).total_seconds()
         print(f"  Query length dist: {di} rows in {elapsed:.1f}s")
         total_dists += di
 
+        conn.commit()
+
+    if not use_polars:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS period_query_totals")
+        conn.commit()
+        cursor.close()
+
     print(f"\nProcessed {len(periods_to_process)} periods successfully")
     print(f"  - {total_queries} top query entries")
     print(f"  - {total_dists} query length distribution rows")
@@ -6,6 +6,7 @@ Called by cron at 4 AM UTC daily, before GitHub Actions dashboard generation.
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 import psycopg2
@@ -17,51 +18,56 @@ def get_db_connection():
     if not database_url:
         raise ValueError("DATABASE_URL environment variable not set")
 
-    # Parse postgresql:// URL to connection params
-    if database_url.startswith('postgresql://'):
-        database_url = database_url.replace('postgresql://', '')
-    elif database_url.startswith('postgresql+asyncpg://'):
-        database_url = database_url.replace('postgresql+asyncpg://', '')
-
-    parts = database_url.split('@')
-    user_pass = parts[0].split(':')
-    host_db = parts[1].split('/')
-    host_port = host_db[0].split(':')
+    # libpq parses the URL itself, including percent-escaped credentials;
+    # only the SQLAlchemy async driver alias needs rewriting
+    if database_url.startswith('postgresql+asyncpg://'):
+        database_url = database_url.replace('postgresql+asyncpg://', 'postgresql://', 1)
 
     return psycopg2.connect(
-        host=host_port[0],
-        port=int(host_port[1]) if len(host_port) > 1 else 5432,
-        user=user_pass[0],
-        password=user_pass[1] if len(user_pass) > 1 else '',
-        dbname=host_db[1],
+        database_url,
         connect_timeout=30,
         options='-c statement_timeout=3600000'  # 60 min timeout for refresh
     )
 
 
-def refresh_views(conn):
-    """Refresh all materialized views"""
-    views = [
-        ('mv_daily_search_tuples', True),  # CONCURRENTLY supported; period stats depend on it
-        ('mv_daily_stats', True),          # CONCURRENTLY supported (has unique index)
-    ]
+VIEWS = [
+    ('mv_daily_search_tuples', True),  # CONCURRENTLY supported; period stats depend on it
+    ('mv_daily_stats', True),          # CONCURRENTLY supported (has unique index)
+]
 
-    cursor = conn.cursor()
 
-    for view_name, concurrent in views:
+def refresh_view(view_name: str, concurrent: bool):
+    """Refresh one materialized view on its own connection"""
+    conn = get_db_connection()
+    try:
         start = datetime.now(timezone.utc)
         print(f"Refreshing {view_name}...")
 
+        cursor = conn.cursor()
         if concurrent:
             cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name}")
         else:
             cursor.execute(f"REFRESH MATERIALIZED VIEW {view_name}")
-
         conn.commit()
+        cursor.close()
+
         elapsed = (datetime.now(timezone.utc) - start).total_seconds()
         print(f"  Refreshed {view_name} in {elapsed:.1f}s")
+    finally:
+        conn.close()
+
 
-    cursor.close()
+def refresh_views():
+    """Refresh all materialized views.
+
+    The views are independent of each other, so each is refreshed on its
+    own connection in parallel and the run takes as long as the slowest.
+    """
+    with ThreadPoolExecutor(max_workers=len(VIEWS)) as ex:
+        futures = [ex.submit(refresh_view, view_name, concurrent)
+                   for view_name, concurrent in VIEWS]
+        for future in futures:
+            future.result()
 
 
 def main():
@@ -69,9 +75,7 @@ def main():
     print(f"Starting view refresh at {datetime.now(timezone.utc).isoformat()}")
 
     try:
-        conn = get_db_connection()
-        refresh_views(conn)
-        conn.close()
+        refresh_views()
         print("View refresh completed successfully")
         return 0
     except Exception as e:
@@ -5,6 +5,11 @@ import logging
 
 import click
 
+try:
+    import uvloop
+except ImportError:  # not available on Windows, falls back to the stdlib event loop
+    uvloop = None
+
 from .client import ResearchClient
 
 
@@ -43,7 +48,10 @@ def start(username: str, password: str, database_url: str, client_id: str, batch
         await client.start()
 
     click.echo(f"Starting research client for {username}")
-    asyncio.run(run_client())
+    if uvloop is not None:
+        uvloop.run(run_client())
+    else:
+        asyncio.run(run_client())
 
 
 # Archival commands removed - these should be handled by database server scripts
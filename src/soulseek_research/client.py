@@ -3,6 +3,7 @@
 import asyncio
 import base64
 import datetime
+import functools
 import hashlib
 import logging
 import os
@@ -13,12 +14,25 @@ from aioslsk.client import SoulSeekClient
 from aioslsk.events import SearchRequestReceivedEvent
 from aioslsk.settings import Settings, CredentialsSettings
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import declarative_base, Mapped, mapped_column
-from sqlalchemy import Integer, String, Text, DateTime, func
+from sqlalchemy import Index, Integer, String, Text, DateTime, func, insert
 
 logger = logging.getLogger(__name__)
 
+# Flushes of at least this many searches are written with COPY instead of INSERT
+COPY_MIN_BATCH = 200
+
+# Column order of the (client_id, username, query, timestamp) tuples queued
+# per search; tuples are what COPY takes and are far smaller than dicts
+SEARCH_COLUMNS = ('client_id', 'username', 'query', 'timestamp')
+
+
+@functools.lru_cache(maxsize=65536)
+def _salted_username_hash(salt: bytes, username: str) -> str:
+    """SHA-256 of salt + username; cached since the same peers search repeatedly"""
+    return hashlib.sha256(salt + username.encode()).hexdigest()
+
 # Simple database models (no archival here)
 Base = declarative_base()
 
@@ -32,6 +46,16 @@ class SearchRecord(Base):
     username: Mapped[str] = mapped_column(String(255), nullable=False)
     query: Mapped[str] = mapped_column(Text, nullable=False)
 
+    # Rows arrive in time order, so a BRIN index prunes the archive's
+    # per-month range scans without a btree's size or insert cost
+    __table_args__ = (
+        Index(
+            'idx_searches_timestamp_brin', 'timestamp',
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+        ),
+    )
+
 
 class ResearchClient:
     """Simple research client - focus only on search collection"""
@@ -92,13 +116,14 @@ class ResearchClient:
         
         # Database (will be setup when needed, not blocking startup)
         self.engine = None
-        self.session_maker = None
         self._db_ready = False
         
         # Search queue for batching
         self._search_queue = deque()
         self._batch_task = None
         self._running = False
+        self._stop_event = asyncio.Event()
+        self._flush_requested = asyncio.Event()
 
         # Stats
         self.searches_logged = 0
@@ -135,8 +160,7 @@ class ResearchClient:
     def hash_username(self, username: str) -> str:
         """Hash username with secret salt for privacy (prevents reverse-lookup attacks)"""
         try:
-            salted = f"{self.hash_salt.decode()}{username}".encode()
-            return hashlib.sha256(salted).hexdigest()
+            return _salted_username_hash(self.hash_salt, username)
         except Exception as e:
             logger.error(f"Failed to hash username: {e}")
             # Fallback to unsalted hash
@@ -150,9 +174,22 @@ class ResearchClient:
         try:
             logger.info("Setting up database connection...")
             
-            # Setup database
-            self.engine = create_async_engine(self.database_url)
-            self.session_maker = async_sessionmaker(self.engine)
+            # Setup database. Flushes run one at a time, so a small pool is
+            # enough; JIT only slows asyncpg's type introspection queries.
+            # Flush commits don't wait for the WAL fsync: a server crash can
+            # lose the last fraction of a second of searches, but never
+            # corrupts the table. create_all below opens the first
+            # connection, which stays in the pool for the first flush.
+            self.engine = create_async_engine(
+                self.database_url,
+                pool_size=2,
+                max_overflow=2,
+                connect_args={"server_settings": {
+                    "jit": "off",
+                    "synchronous_commit": "off",
+                    "application_name": self.client_id,
+                }},
+            )
             
             # Create tables
             async with self.engine.begin() as conn:
@@ -208,14 +245,14 @@ class ResearchClient:
         
         logger.info(f"Client {self.client_id} fully started")
         
-        # Keep running
+        # Keep running: wake every 30 seconds for the heartbeat, or at once on stop()
         try:
-            heartbeat_counter = 0
             while self._running:
-                await asyncio.sleep(1)
-                heartbeat_counter += 1
-                # Log heartbeat every 30 seconds for debugging
-                if heartbeat_counter % 30 == 0:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    pass
+                if self._running:
                     received_count = len(self.soulseek_client.searches.received_searches)
                     queue_size = len(self._search_queue)
 
@@ -262,6 +299,8 @@ class ResearchClient:
         """Stop the client"""
         logger.info(f"Stopping client {self.client_id}")
         self._running = False
+        self._stop_event.set()
+        self._flush_requested.set()
         
         if self._batch_task:
             await self._batch_task
@@ -283,18 +322,22 @@ class ResearchClient:
         # Hash username for privacy
         hashed_username = self.hash_username(event.username)
 
-        search = SearchRecord(
-            client_id=self.client_id,
-            username=hashed_username,
-            query=event.query,
-            timestamp=datetime.datetime.now(datetime.timezone.utc)
+        # Plain row tuple in SEARCH_COLUMNS order, no ORM objects
+        search = (
+            self.client_id,
+            hashed_username,
+            event.query,
+            datetime.datetime.now(datetime.timezone.utc),
         )
 
+        # Runs once per search packet: look the queue up once
+        queue = self._search_queue
+
         # Check if queue is at max size - drop oldest items if needed
-        if len(self._search_queue) >= self.max_queue_size:
-            dropped_count = len(self._search_queue) - self.max_queue_size + 1000  # Drop 1000 at a time for efficiency
-            for _ in range(min(dropped_count, len(self._search_queue))):
-                self._search_queue.popleft()
+        if len(queue) >= self.max_queue_size:
+            dropped_count = len(queue) - self.max_queue_size + 1000  # Drop 1000 at a time for efficiency
+            for _ in range(min(dropped_count, len(queue))):
+                queue.popleft()
                 self.searches_dropped += 1
 
             logger.warning(
@@ -304,17 +347,21 @@ class ResearchClient:
                 f"Database may be down - check connection!"
             )
 
-        self._search_queue.append(search)
+        queue.append(search)
         self.searches_logged += 1
 
-        # Immediate flush if queue full
-        if len(self._search_queue) >= self.batch_size:
-            await self._flush_searches()
+        # Full batch: wake the batch worker, the only writer, to flush now
+        if len(queue) >= self.batch_size:
+            self._flush_requested.set()
     
     async def _batch_worker(self):
-        """Background worker to flush searches every 10 seconds"""
+        """Background worker to flush searches every 10 seconds, or as soon as a batch is full"""
         while self._running:
-            await asyncio.sleep(10)
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
             if self._search_queue:
                 await self._flush_searches()
     
@@ -331,9 +378,20 @@ class ResearchClient:
         self._search_queue.clear()
 
         try:
-            async with self.session_maker() as session:
-                session.add_all(batch)
-                await session.commit()
+            async with self.engine.begin() as conn:
+                if len(batch) >= COPY_MIN_BATCH:
+                    # Binary COPY: no per-row statement parsing on the server
+                    raw = await conn.get_raw_connection()
+                    await raw.driver_connection.copy_records_to_table(
+                        SearchRecord.__tablename__,
+                        records=batch,
+                        columns=SEARCH_COLUMNS,
+                    )
+                else:
+                    await conn.execute(
+                        insert(SearchRecord),
+                        [dict(zip(SEARCH_COLUMNS, row)) for row in batch],
+                    )
 
             logger.debug(f"Saved {len(batch)} searches (total: {self.searches_logged})")
 